@@ -1,124 +1,108 @@
 import streamlit as st
-import pandas as pd
-import os
+from core.cards import approximate_note, card, distinct_value
+from core.filters import render_filters
+from core.metrics import PageTimer
+from core.queries import (
+    DETAIL_PAGE_SIZES,
+    DETAIL_SORTS,
+    dashboard_results,
+    detail_rows,
+)
+from core.sources import get_source
 
 # Configuración de la página
 st.set_page_config(
     page_title="Dashboard Oferta Internacional", page_icon="🌍", layout="wide"
 )
 
+# Tiempos por etapa de esta ejecución
+perf = PageTimer("Dashboard")
+
+
+# Tabla dinámica: búsqueda, orden y paginado en el servidor; al navegador
+# solo se envía la página visible. Es un fragmento con la tabla agregada como
+# argumento: sus widgets solo vuelven a ejecutar la tabla, no la página.
+@st.fragment
+def tabla_detalle(df_tabla, perf):
+    with perf.section("tabla") as timer:
+        st.subheader("📋 Detalle de Carreras")
+
+        col_buscar, col_orden, col_tamano, col_pagina = st.columns([2, 1.5, 0.8, 0.8])
+        with col_buscar:
+            texto = st.text_input("Buscar carrera", key="tabla_buscar")
+        with col_orden:
+            orden = st.selectbox("Ordenar por", list(DETAIL_SORTS), key="tabla_orden")
+        with col_tamano:
+            tamano = st.selectbox(
+                "Filas por página", DETAIL_PAGE_SIZES, index=1, key="tabla_tamano"
+            )
+
+        df_detalle = detail_rows(df_tabla, texto, orden)
+        num_filas = len(df_detalle)
+        num_paginas = max(1, -(-num_filas // tamano))
+        with col_pagina:
+            pagina = st.number_input(
+                "Página", min_value=1, max_value=num_paginas, value=1, step=1
+            )
+        inicio = (int(pagina) - 1) * tamano
+        df_pagina = df_detalle.iloc[inicio : inicio + tamano]
+        timer.mark("agregacion")
+
+        # Calcular altura dinámica de la tabla (aproximadamente 35px por fila + header)
+        altura_fila = 35
+        altura_header = 40
+        altura_minima = 100
+        altura_maxima = 500
+
+        altura_dinamica = max(
+            altura_minima,
+            min(len(df_pagina) * altura_fila + altura_header, altura_maxima),
+        )
 
-# Función para cargar datos
-@st.cache_data
-def load_data():
-    file_path = os.path.join("db", "base.xlsx")
-    try:
-        df = pd.read_excel(file_path)
-        # Limpiar nombres de columnas
-        df.columns = df.columns.str.strip()
-
-        # Normalizar espacios en columnas usadas por filtros
-        filter_cols = ["PAIS", "FINANCIAMIENTO", "TIPO", "NIVEL", "FACULTAD ASOCIADA"]
-        for col in filter_cols:
-            if col in df.columns:
-                df[col] = df[col].astype("string").str.strip()
-        return df
-    except Exception as e:
-        st.error(f"Error al cargar el archivo: {str(e)}")
-        return None
-
+        # Mostrar tabla con formato
+        st.dataframe(
+            df_pagina,
+            use_container_width=True,
+            height=int(altura_dinamica),
+            hide_index=True,
+            column_config={
+                "CARRERA": st.column_config.TextColumn("CARRERA", width="large"),
+                "MATRICULADOS": st.column_config.NumberColumn(
+                    "MATRICULADOS", format="%d"
+                ),
+            },
+        )
+        timer.mark("serializacion")
 
-def sort_filter_values(values):
-    return sorted(values, key=lambda v: str(v).lower())
+        # Información adicional (sobre el resultado completo, no solo la página)
+        if num_filas > 0:
+            st.caption(
+                f"Filas {inicio + 1}–{inicio + len(df_pagina)} de {num_filas} "
+                f"· página {int(pagina)} de {num_paginas}"
+            )
+        st.info(f"📊 Total de registros mostrados: **{num_filas}**")
 
 
-# Cargar datos
-df = load_data()
+# Cargar datos (Excel o base de datos)
+source = get_source()
+perf.mark("carga")
 
-if df is not None:
+if source is not None:
     # Título principal
     st.title("🌍 Dashboard Oferta Internacional")
 
     # Sección de filtros
     st.subheader("🔍 Filtros")
 
-    # Crear 5 columnas para los filtros
-    col1, col2, col3, col4, col5 = st.columns(5)
-
-    # Filtro 1: País
-    with col1:
-        paises = ["Todos"] + sort_filter_values(
-            df["PAIS"].dropna().unique().tolist()
-        )
-        pais_seleccionado = st.selectbox("País", paises, key="pais")
-
-    # Aplicar filtro de país
-    if pais_seleccionado != "Todos":
-        df_filtrado = df[df["PAIS"] == pais_seleccionado]
-    else:
-        df_filtrado = df.copy()
-
-    # Filtro 2: Financiamiento (cascada)
-    with col2:
-        financiamientos = ["Todos"] + sort_filter_values(
-            [
-                f
-                for f in df_filtrado["FINANCIAMIENTO"].dropna().unique().tolist()
-                if f != "SIN ESPECIFICAR"
-            ]
-        )
-        financiamiento_seleccionado = st.selectbox(
-            "Financiamiento", financiamientos, key="financiamiento"
-        )
-
-    # Aplicar filtro de financiamiento
-    if financiamiento_seleccionado != "Todos":
-        df_filtrado = df_filtrado[
-            df_filtrado["FINANCIAMIENTO"] == financiamiento_seleccionado
-        ]
-
-    # Filtro 3: Tipo (cascada)
-    with col3:
-        tipos = ["Todos"] + sort_filter_values(
-            [
-                t
-                for t in df_filtrado["TIPO"].dropna().unique().tolist()
-                if t != "SIN CLASIFICAR"
-            ]
-        )
-        tipo_seleccionado = st.selectbox("Tipo", tipos, key="tipo")
-
-    # Aplicar filtro de tipo
-    if tipo_seleccionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["TIPO"] == tipo_seleccionado]
-
-    # Filtro 4: Nivel (cascada)
-    with col4:
-        niveles = ["Todos"] + sort_filter_values(
-            df_filtrado["NIVEL"].dropna().unique().tolist()
-        )
-        nivel_seleccionado = st.selectbox("Nivel", niveles, key="nivel")
-
-    # Aplicar filtro de nivel
-    if nivel_seleccionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["NIVEL"] == nivel_seleccionado]
-
-    # Filtro 5: Facultad (cascada)
-    with col5:
-        facultades = ["Todos"] + sort_filter_values(
-            df_filtrado["FACULTAD ASOCIADA"].dropna().unique().tolist()
-        )
-        facultad_seleccionada = st.selectbox("Facultad", facultades, key="facultad")
-
-    # Aplicar filtro de facultad
-    if facultad_seleccionada != "Todos":
-        df_filtrado = df_filtrado[
-            df_filtrado["FACULTAD ASOCIADA"] == facultad_seleccionada
-        ]
+    selecciones = render_filters(source)
+    perf.log_selections(selecciones)
+    perf.mark("filtros")
 
     # Calcular métricas
-    total_matriculados = int(df_filtrado["MATRICULADOS"].sum())
-    total_universidades = df_filtrado["NOMBRE INSTITUCION"].nunique()
+    totales, df_tabla = dashboard_results(source, selecciones)
+    total_matriculados = int(totales["MATRICULADOS"])
+    total_universidades = distinct_value(totales, "INSTITUCIONES")
+    perf.mark("agregacion")
 
     # Tarjetas minimalistas con HTML/CSS personalizado
     st.subheader("📊 Resumen")
@@ -126,87 +110,19 @@ if df is not None:
     # Crear contenedor con tarjetas centradas
     col1, card1, col2, card2, col3 = st.columns([0.8, 1.2, 0.6, 1.2, 0.8])
 
-    # Tarjeta 1: Total Matriculados
     with card1:
-        st.markdown(
-            f"""
-        <div style="
-            background: linear-gradient(135deg, #3b82f6 0%, #1d4ed8 100%);
-            padding: 24px 28px;
-            border-radius: 10px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-            text-align: center;
-            color: white;
-        ">
-            <div style="font-size: 36px; margin-bottom: 10px;">👥</div>
-            <div style="font-size: 13px; opacity: 0.95; margin-bottom: 8px; font-weight: 500; letter-spacing: 0.3px;">Total Matriculados</div>
-            <div style="font-size: 32px; font-weight: bold; line-height: 1.2;">{total_matriculados:,}</div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
-
-    # Tarjeta 2: Universidades
+        card("👥", "Total Matriculados", f"{total_matriculados:,}", "azul", large=True)
     with card2:
-        st.markdown(
-            f"""
-        <div style="
-            background: linear-gradient(135deg, #10b981 0%, #34d399 100%);
-            padding: 24px 28px;
-            border-radius: 10px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-            text-align: center;
-            color: white;
-        ">
-            <div style="font-size: 36px; margin-bottom: 10px;">🏫</div>
-            <div style="font-size: 13px; opacity: 0.95; margin-bottom: 8px; font-weight: 500; letter-spacing: 0.3px;">Universidades</div>
-            <div style="font-size: 32px; font-weight: bold; line-height: 1.2;">{total_universidades}</div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
-
-    # Tabla dinámica
-    st.subheader("📋 Detalle de Carreras")
-
-    # Preparar datos para la tabla
-    df_tabla = df_filtrado[["NOMBRE CARRERA", "MATRICULADOS"]].copy()
-    df_tabla = df_tabla.rename(columns={"NOMBRE CARRERA": "CARRERA"})
-
-    # Agrupar por carrera y sumar matriculados
-    df_tabla = df_tabla.groupby("CARRERA", as_index=False)["MATRICULADOS"].sum()
+        card("🏫", "Universidades", total_universidades, "verde", large=True)
+    approximate_note(totales)
 
-    # Ordenar de mayor a menor por matriculados
-    df_tabla = df_tabla.sort_values("MATRICULADOS", ascending=False)
+    perf.mark("tarjetas")
 
-
-    # Calcular altura dinámica de la tabla (aproximadamente 35px por fila + header)
-    num_filas = len(df_tabla)
-    altura_fila = 35
-    altura_header = 40
-    altura_minima = 100
-    altura_maxima = 500
-
-    altura_dinamica = max(
-        altura_minima, min(num_filas * altura_fila + altura_header, altura_maxima)
-    )
-
-    # Mostrar tabla con formato
-    st.dataframe(
-        df_tabla,
-        use_container_width=True,
-        height=int(altura_dinamica),
-        hide_index=True,
-        column_config={
-            "CARRERA": st.column_config.TextColumn("CARRERA", width="large"),
-            "MATRICULADOS": st.column_config.NumberColumn("MATRICULADOS", format="%d"),
-        },
-    )
-
-    # Información adicional
-    st.info(f"📊 Total de registros mostrados: **{len(df_tabla)}**")
+    tabla_detalle(df_tabla, perf)
 
 else:
     st.error(
         "⚠️ No se pudo cargar el archivo base.xlsx. Verifica que el archivo existe en la carpeta 'db'."
     )
+
+perf.finish()
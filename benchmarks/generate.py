@@ -0,0 +1,134 @@
+import argparse
+import os
+
+import numpy as np
+import openpyxl
+
+# Generador de libros sintéticos con el esquema de db/base.xlsx.
+# Las cardinalidades imitan los datos reales: pocos valores en los filtros,
+# miles de carreras con distribución de Zipf e instituciones que crecen con
+# el tamaño del libro (cada institución tiene un país, financiamiento y tipo).
+#
+#   python -m benchmarks.generate --rows 100000 --output db/base.xlsx
+
+COLUMNS = [
+    "PAIS",
+    "FINANCIAMIENTO",
+    "TIPO",
+    "NIVEL",
+    "FACULTAD ASOCIADA",
+    "NOMBRE CARRERA",
+    "NOMBRE INSTITUCION",
+    "MATRICULADOS",
+]
+
+PAISES = [
+    "ARGENTINA", "BOLIVIA", "BRASIL", "CHILE", "COLOMBIA", "COSTA RICA", "CUBA",
+    "ECUADOR", "EL SALVADOR", "ESPAÑA", "GUATEMALA", "HONDURAS", "MEXICO",
+    "NICARAGUA", "PANAMA", "PARAGUAY", "PERU", "PORTUGAL", "REPUBLICA DOMINICANA",
+    "URUGUAY", "VENEZUELA",
+]
+FINANCIAMIENTOS = ["PUBLICA", "PRIVADA", "SIN ESPECIFICAR"]
+TIPOS = ["UNIVERSIDAD", "INSTITUTO", "SIN CLASIFICAR"]
+NIVELES = ["PREGRADO", "POSGRADO"]
+FACULTADES = [
+    "ARTES", "CIENCIAS", "CIENCIAS SOCIALES", "COMUNICACION", "DERECHO",
+    "EDUCACION", "HOSPITALIDAD", "INGENIERIA", "MEDICINA", "NEGOCIOS",
+    "PSICOLOGIA", "SALUD",
+]
+
+# Filas escritas por bloque (openpyxl en modo write_only)
+WRITE_CHUNK_ROWS = 50_000
+
+
+# Cardinalidades según el número de filas
+def cardinalities(rows):
+    return {
+        "carreras": int(min(8_000, max(200, rows // 150))),
+        "instituciones": int(min(25_000, max(100, rows // 60))),
+    }
+
+
+# Columnas del libro como arreglos (mismo resultado para la misma semilla)
+def generate_columns(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = cardinalities(rows)
+
+    # Atributos fijos por institución
+    num_inst = sizes["instituciones"]
+    inst_pais = rng.choice(len(PAISES), num_inst, p=_zipf_weights(len(PAISES), 1.1))
+    inst_fin = rng.choice(len(FINANCIAMIENTOS), num_inst, p=[0.35, 0.55, 0.10])
+    inst_tipo = rng.choice(len(TIPOS), num_inst, p=[0.70, 0.22, 0.08])
+
+    # Instituciones y carreras con popularidad desigual
+    inst = rng.choice(num_inst, rows, p=_zipf_weights(num_inst, 0.8))
+    carrera = rng.choice(
+        sizes["carreras"], rows, p=_zipf_weights(sizes["carreras"], 1.05)
+    )
+
+    paises = np.array(PAISES, dtype=object)[inst_pais[inst]]
+    # Algunos países con espacios sobrantes, como en los libros reales
+    sucios = rng.random(rows) < 0.02
+    paises[sucios] = [f" {p} " for p in paises[sucios]]
+
+    return {
+        "PAIS": paises,
+        "FINANCIAMIENTO": np.array(FINANCIAMIENTOS, dtype=object)[inst_fin[inst]],
+        "TIPO": np.array(TIPOS, dtype=object)[inst_tipo[inst]],
+        "NIVEL": np.array(NIVELES, dtype=object)[
+            (rng.random(rows) < 0.3).astype(np.int8)
+        ],
+        "FACULTAD ASOCIADA": np.array(FACULTADES, dtype=object)[
+            carrera % len(FACULTADES)
+        ],
+        "NOMBRE CARRERA": np.array(
+            [f"CARRERA {i}" for i in range(sizes["carreras"])], dtype=object
+        )[carrera],
+        "NOMBRE INSTITUCION": np.array(
+            [f"INSTITUCION {i}" for i in range(num_inst)], dtype=object
+        )[inst],
+        "MATRICULADOS": np.maximum(
+            1, rng.lognormal(mean=2.5, sigma=1.2, size=rows)
+        ).astype(np.int64),
+    }
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+# Escribir el libro sintético (una hoja, encabezados en la primera fila)
+def write_workbook(path, rows, seed=0):
+    columns = generate_columns(rows, seed)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(COLUMNS)
+    for start in range(0, rows, WRITE_CHUNK_ROWS):
+        block = [columns[col][start : start + WRITE_CHUNK_ROWS].tolist() for col in COLUMNS]
+        for row in zip(*block):
+            sheet.append(row)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un base.xlsx sintético")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join("db", "base.xlsx"))
+    args = parser.parse_args(argv)
+
+    write_workbook(args.output, args.rows, args.seed)
+    print(f"{args.output}: {args.rows} filas (semilla {args.seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate import write_workbook
+
+# Suite de rendimiento: genera (o reutiliza) libros sintéticos de varios
+# tamaños y mide por separado cada etapa que recorren las páginas.
+#
+#   python -m benchmarks.run --rows 10000 100000 1000000 --output bench.json
+#
+# Etapas:
+#   ingesta_fria     load_local_source() sin snapshot (lectura del libro y cubo)
+#   carga_snapshot   load_local_source() con snapshot en disco
+#   cubo             build_cube() sobre la tabla cargada
+#   artefacto        build_artifact() (python -m core.artifact) una vez
+#   carga_artefacto  load_artifact(): arranque desde el artefacto
+#   cascada_filtros  opciones de todos los filtros para una selección
+#   tabla_dashboard  tabla de detalle de Dashboard.py
+#   rankings         rankings de carreras y universidades de 2_Ranking.py
+#   burbujas         agregación del bubble chart de 3_Instituciones.py
+# Las consultas se miden sin caché de resultados (RESULTS se vacía antes y
+# no se usa la caché en disco).
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_DIR, "benchmarks", ".data")
+
+
+# Libro sintético reutilizable por (filas, semilla)
+def workbook_for(rows, seed):
+    path = os.path.join(CACHE_DIR, f"base-{rows}-{seed}.xlsx")
+    if not os.path.exists(path):
+        write_workbook(path, rows, seed)
+    return path
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _summary(samples):
+    samples = np.asarray(samples, dtype=float)
+    return {
+        "n": int(len(samples)),
+        "min": float(samples.min()),
+        "mediana": float(np.median(samples)),
+        "p95": float(np.percentile(samples, 95)),
+        "max": float(samples.max()),
+    }
+
+
+# Selecciones de prueba: "Todos", un país, y combinaciones cada vez más
+# específicas tomadas de filas reales de la tabla
+def scenarios(df, filter_columns, count, seed):
+    rng = np.random.default_rng(seed)
+    result = [{}]
+    pais = df["PAIS"].value_counts().index[0]
+    result.append({"PAIS": pais})
+    for position in rng.choice(len(df), size=max(0, count - 2), replace=False):
+        row = df.iloc[int(position)]
+        depth = int(rng.integers(2, len(filter_columns) + 1))
+        result.append(
+            {
+                col: row[col]
+                for col in filter_columns[:depth]
+                if not pd.isna(row[col])
+            }
+        )
+    return result[:count]
+
+
+# Medir todas las etapas sobre un libro en un directorio de trabajo temporal
+def run_stages(workbook, repeat, num_scenarios, seed):
+    from core import cube as cube_module
+    from core import loader
+    from core.artifact import ARTIFACT_PATH, build_artifact, load_artifact
+    from core.cache import RESULTS
+    from core.filters import FILTERS
+    from core.queries import bubble_results, dashboard_results, ranking_results
+    from core.refresh import load_local_source
+
+    stages = {}
+    workdir = tempfile.mkdtemp(prefix="oferta-bench-")
+    previous_dir = os.getcwd()
+    l2, RESULTS.l2 = RESULTS.l2, None
+    try:
+        os.makedirs(os.path.join(workdir, loader.DATA_DIR))
+        shutil.copy(workbook, os.path.join(workdir, loader.WORKBOOK_PATH))
+        os.chdir(workdir)
+
+        # Carga: en frío (sin snapshot) una vez, luego desde el snapshot; como
+        # en las páginas (core.refresh), con el cubo construido desde cero
+        cube_module._current.clear()
+        _, elapsed = _timed(load_local_source)
+        stages["ingesta_fria"] = [elapsed]
+        stages["carga_snapshot"] = []
+        for _ in range(repeat):
+            cube_module._current.clear()
+            _, elapsed = _timed(load_local_source)
+            stages["carga_snapshot"].append(elapsed)
+
+        df = loader.freeze_frame(loader.load_dataset())
+        stages["cubo"] = []
+        for _ in range(repeat):
+            cube_module._current.clear()
+            source, elapsed = _timed(cube_module.build_cube, df.attrs["version"], df)
+            stages["cubo"].append(elapsed)
+
+        _, elapsed = _timed(build_artifact, df, ARTIFACT_PATH)
+        stages["artefacto"] = [elapsed]
+        stages["carga_artefacto"] = []
+        for _ in range(repeat):
+            _, elapsed = _timed(load_artifact, ARTIFACT_PATH)
+            stages["carga_artefacto"].append(elapsed)
+
+        filtros = [f for f in FILTERS if f[0] in source.filter_columns]
+        selecciones = scenarios(df, source.filter_columns, num_scenarios, seed)
+
+        def cascade(selection):
+            applied = {}
+            for col, _, _, excluded in filtros:
+                source.options(col, applied, exclude=excluded)
+                if col in selection:
+                    applied[col] = selection[col]
+
+        queries = {
+            "cascada_filtros": cascade,
+            "tabla_dashboard": lambda sel: dashboard_results(source, sel),
+            "rankings": lambda sel: ranking_results(source, sel),
+            "burbujas": lambda sel: bubble_results(source, sel),
+        }
+        for name, query in queries.items():
+            stages[name] = []
+            for _ in range(repeat):
+                for selection in selecciones:
+                    RESULTS.clear()
+                    _, elapsed = _timed(query, selection)
+                    stages[name].append(elapsed)
+        num_rows = len(df)
+    finally:
+        RESULTS.l2 = l2
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return num_rows, {name: _summary(samples) for name, samples in stages.items()}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento por etapas")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scenarios", type=int, default=8)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args(argv)
+
+    # Streamlit avisa que no hay contexto de ejecución al usar las cachés
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    sys.path.insert(0, REPO_DIR)
+
+    report = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+        "repeticiones": args.repeat,
+        "escenarios": args.scenarios,
+        "corridas": [],
+    }
+    for rows in args.rows:
+        workbook = workbook_for(rows, args.seed)
+        num_rows, stages = run_stages(workbook, args.repeat, args.scenarios, args.seed)
+        report["corridas"].append(
+            {"filas": num_rows, "semilla": args.seed, "etapas": stages}
+        )
+        for name, stats in stages.items():
+            print(
+                f"{num_rows:>10} {name:<16} mediana {stats['mediana'] * 1e3:9.1f} ms"
+                f"  p95 {stats['p95'] * 1e3:9.1f} ms  (n={stats['n']})"
+            )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.run import REPO_DIR, _git_commit, _summary, workbook_for
+
+# Arranque de cada página en un proceso nuevo (como un worker recién creado):
+#
+#   python -m benchmarks.startup --rows 100000 --repeat 5 --output startup.json
+#
+# Por página y modo de datos se mide:
+#   importacion        imports de nivel superior del script (ya con streamlit)
+#   primera_ejecucion  primera ejecución completa (AppTest), cachés vacías
+#   ejecucion_caliente segunda ejecución en el mismo proceso
+# y qué dependencias pesadas quedaron importadas.
+# Modos: "snapshot" (libro con snapshot en disco) y "artefacto" (solo
+# db/oferta.sqlite, sin libros).
+
+PAGES = ["Dashboard.py", "pages/2_Ranking.py", "pages/3_Instituciones.py"]
+MODES = ["snapshot", "artefacto"]
+HEAVY_MODULES = ["openpyxl", "plotly", "pyarrow"]
+
+# Se ejecuta en el proceso hijo: argv = ruta del script de la página
+CHILD = """
+import ast, json, logging, sys, time
+logging.disable(logging.CRITICAL)
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+page = sys.argv[1]
+with open(page, encoding="utf-8") as f:
+    tree = ast.parse(f.read())
+imports = ast.Module(
+    body=[n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))],
+    type_ignores=[],
+)
+start = time.perf_counter()
+exec(compile(imports, page, "exec"), {})
+importacion = time.perf_counter() - start
+
+at = AppTest.from_file(page, default_timeout=600)
+start = time.perf_counter()
+at.run()
+primera = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+caliente = time.perf_counter() - start
+
+print(json.dumps({
+    "importacion": importacion,
+    "primera_ejecucion": primera,
+    "ejecucion_caliente": caliente,
+    "modulos": {m: m in sys.modules for m in json.loads(sys.argv[2])},
+    "error": at.exception[0].message if at.exception else None,
+}))
+"""
+
+
+# Directorio de trabajo con los datos del modo indicado
+def prepare(workbook, mode):
+    workdir = tempfile.mkdtemp(prefix="oferta-startup-")
+    data_dir = os.path.join(workdir, "db")
+    os.makedirs(data_dir)
+    shutil.copy(workbook, os.path.join(data_dir, "base.xlsx"))
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    command = "from core.loader import load_dataset; load_dataset('db')"
+    if mode == "artefacto":
+        command = "from core.artifact import main; main([])"
+    subprocess.run(
+        [sys.executable, "-c", command],
+        cwd=workdir,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    if mode == "artefacto":
+        os.remove(os.path.join(data_dir, "base.xlsx"))
+        shutil.rmtree(os.path.join(data_dir, ".snapshots"), ignore_errors=True)
+    return workdir
+
+
+def measure(workdir, page):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHILD,
+            os.path.join(REPO_DIR, page),
+            json.dumps(HEAVY_MODULES),
+        ],
+        cwd=workdir,
+        # Sin caché en disco ni precalentamiento: cada arranque parte sin
+        # resultados guardados
+        env=dict(
+            os.environ, PYTHONPATH=REPO_DIR, OFERTA_DISK_CACHE="", OFERTA_WARM_TOP="0"
+        ),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arranque en frío por página")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--output", default="startup.json")
+    args = parser.parse_args(argv)
+
+    workbook = workbook_for(args.rows, args.seed)
+    report = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "filas": args.rows,
+        "repeticiones": args.repeat,
+        "modos": {},
+    }
+    for mode in args.modes:
+        workdir = prepare(workbook, mode)
+        try:
+            paginas = {}
+            for page in PAGES:
+                runs = [measure(workdir, page) for _ in range(args.repeat)]
+                errores = [run["error"] for run in runs if run["error"]]
+                paginas[page] = {
+                    stage: _summary([run[stage] for run in runs])
+                    for stage in ["importacion", "primera_ejecucion", "ejecucion_caliente"]
+                }
+                paginas[page]["modulos"] = runs[-1]["modulos"]
+                paginas[page]["errores"] = errores
+                cargados = [m for m, loaded in runs[-1]["modulos"].items() if loaded]
+                print(
+                    f"{mode:<10} {page:<26} "
+                    + "  ".join(
+                        f"{stage} {np.median([run[stage] for run in runs]) * 1e3:7.1f} ms"
+                        for stage in ["importacion", "primera_ejecucion", "ejecucion_caliente"]
+                    )
+                    + f"  [{', '.join(cargados) or '-'}]"
+                    + (f"  ERROR: {errores[0]}" if errores else "")
+                )
+            report["modos"][mode] = paginas
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.run import REPO_DIR, _git_commit, workbook_for
+
+# Memoria de varios workers sirviendo los mismos datos en la misma máquina:
+#
+#   python -m benchmarks.workers --rows 100000 --workers 1 2 4 8 --output workers.json
+#
+# Cada worker es un proceso nuevo que carga la fuente local (load_local_source)
+# y ejecuta las consultas de las páginas; con todos cargados a la vez se lee
+# /proc/<pid>/smaps de cada uno:
+#   rss        memoria residente (cuenta las páginas compartidas en cada proceso)
+#   pss        residente con las páginas compartidas repartidas entre procesos
+#              (la suma es la memoria física real)
+#   privada    páginas solo de ese proceso
+#   datos      privada después de cargar y consultar menos antes (incluye
+#              imports diferidos y memoria de trabajo de las consultas; los
+#              imports de Python, pandas y streamlit son fijos por proceso)
+#   mapeada    pss de los arreglos de db/.shared
+# Modos: "privado" (cada worker con su copia) y "compartido"
+# (OFERTA_SHARED_MEMORY=1, arreglos mapeados de core.shared).
+
+MODES = {"privado": "0", "compartido": "1"}
+
+MAPPING_HEADER = re.compile(r"[0-9a-f]+-[0-9a-f]+ ")
+
+# Se ejecuta en el proceso hijo: carga, consulta, informa y espera a que el
+# padre mida (una línea por stdin) antes de salir
+CHILD = """
+import json, logging, sys
+logging.disable(logging.CRITICAL)
+from benchmarks.workers import memory
+from core.refresh import load_local_source
+
+antes = memory()
+source = load_local_source()
+source.totals({})
+for col in source.filter_columns:
+    for value in source.options(col, {})[:3]:
+        source.totals({col: value})
+        source.sum_by("NOMBRE CARRERA", {col: value})
+        source.sum_by("NOMBRE INSTITUCION", {col: value})
+        source.career_metrics({col: value})
+print(json.dumps({"antes": antes}), flush=True)
+sys.stdin.readline()
+"""
+
+
+# Memoria (bytes) de un proceso según /proc/<pid>/smaps; `mapped_dir` separa
+# la pss de los archivos bajo ese directorio
+def memory(pid="self", mapped_dir=None):
+    result = {"rss": 0, "pss": 0, "privada": 0, "mapeada": 0}
+    in_mapped = False
+    with open(f"/proc/{pid}/smaps", encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if MAPPING_HEADER.match(line):
+                # Encabezado de un mapeo: "inicio-fin permisos offset dev inodo [ruta]"
+                path = fields[5] if len(fields) > 5 else ""
+                in_mapped = mapped_dir is not None and path.startswith(mapped_dir)
+                continue
+            name = fields[0].rstrip(":")
+            if name not in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                continue
+            value = int(fields[1]) * 1024
+            if name == "Rss":
+                result["rss"] += value
+            elif name == "Pss":
+                result["pss"] += value
+                if in_mapped:
+                    result["mapeada"] += value
+            else:
+                result["privada"] += value
+    return result
+
+
+# Directorio de trabajo con el libro, su snapshot y (modo compartido) los
+# arreglos ya escritos: se mide servir, no construir
+def prepare(workbook):
+    workdir = tempfile.mkdtemp(prefix="oferta-workers-")
+    os.makedirs(os.path.join(workdir, "db"))
+    shutil.copy(workbook, os.path.join(workdir, "db", "base.xlsx"))
+    subprocess.run(
+        [sys.executable, "-c", "from core.shared import ensure_shared; ensure_shared()"],
+        cwd=workdir,
+        env=dict(os.environ, PYTHONPATH=REPO_DIR),
+        check=True,
+        capture_output=True,
+    )
+    return workdir
+
+
+def measure(workdir, mode, num_workers):
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_DIR,
+        OFERTA_SHARED_MEMORY=MODES[mode],
+        OFERTA_REFRESH_INTERVAL="0",
+    )
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", CHILD],
+            cwd=workdir,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(num_workers)
+    ]
+    try:
+        antes = [json.loads(worker.stdout.readline())["antes"] for worker in workers]
+        mapped_dir = os.path.join(workdir, "db", ".shared")
+        despues = [memory(worker.pid, mapped_dir) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.stdin.write("\n")
+            worker.stdin.close()
+        for worker in workers:
+            worker.wait()
+
+    return {
+        "workers": num_workers,
+        "rss_total": sum(m["rss"] for m in despues),
+        "pss_total": sum(m["pss"] for m in despues),
+        "privada_por_worker": sum(m["privada"] for m in despues) / num_workers,
+        "datos_por_worker": sum(
+            d["privada"] - a["privada"] for a, d in zip(antes, despues)
+        )
+        / num_workers,
+        "mapeada_total": sum(m["mapeada"] for m in despues),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria de varios workers")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--output", default="workers.json")
+    args = parser.parse_args(argv)
+
+    workbook = workbook_for(args.rows, args.seed)
+    report = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "filas": args.rows,
+        "modos": {},
+    }
+    workdir = prepare(workbook)
+    try:
+        for mode in args.modes:
+            report["modos"][mode] = []
+            for num_workers in args.workers:
+                result = measure(workdir, mode, num_workers)
+                report["modos"][mode].append(result)
+                print(
+                    f"{mode:<10} {num_workers:>2} workers  "
+                    f"rss {result['rss_total'] / 2**20:7.1f} MB  "
+                    f"pss {result['pss_total'] / 2**20:7.1f} MB  "
+                    f"datos/worker {result['datos_por_worker'] / 2**20:6.1f} MB  "
+                    f"mapeada {result['mapeada_total'] / 2**20:5.1f} MB"
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from core.loader import DATA_DIR
+
+# Registro liviano de accesos: por (página, selección de filtros) cuántas
+# ejecuciones hubo, cuánto tardaron en total y cuándo fue la última. Lo
+# comparten los procesos de la máquina (SQLite local) y sobrevive a los
+# reinicios; core.warmup lo usa para precalcular las combinaciones más
+# visitadas.
+#   OFERTA_ACCESS_LOG   ruta del archivo (vacío = sin registro)
+ACCESS_LOG_ENV = "OFERTA_ACCESS_LOG"
+ACCESS_LOG_PATH = os.environ.get(
+    ACCESS_LOG_ENV, os.path.join(DATA_DIR, ".cache", "accesos.sqlite")
+)
+
+# Los accesos se acumulan en memoria y se escriben como mucho cada
+# FLUSH_INTERVAL segundos (una transacción por lote, no por ejecución)
+FLUSH_INTERVAL = 10
+
+# Días sin visitas tras los cuales una combinación sale del registro
+RETENTION_DAYS = 14
+
+BUSY_TIMEOUT = 5
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accesos (
+    pagina TEXT NOT NULL, seleccion TEXT NOT NULL,
+    visitas INTEGER NOT NULL, segundos REAL NOT NULL, ultima REAL NOT NULL,
+    PRIMARY KEY (pagina, seleccion)
+) WITHOUT ROWID;
+"""
+
+
+# Selección como texto (claves ordenadas; valores numpy como nativos)
+def _selection_text(selections):
+    return json.dumps(
+        selections,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=lambda value: value.item() if isinstance(value, np.generic) else str(value),
+    )
+
+
+class AccessLog:
+    def __init__(self, path):
+        self.path = path
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    # Anotar una ejecución de `page` con `selections` que tardó `seconds`
+    def record(self, page, selections, seconds):
+        key = (page, _selection_text(selections))
+        now = time.monotonic()
+        with self._lock:
+            visitas, segundos, _ = self._pending.get(key, (0, 0.0, 0.0))
+            self._pending[key] = (visitas + 1, segundos + seconds, time.time())
+            due = now - self._flushed >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    # Escribir los accesos acumulados (y olvidar combinaciones viejas)
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany(
+                        "INSERT INTO accesos VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (pagina, seleccion) DO UPDATE SET "
+                        "visitas = visitas + excluded.visitas, "
+                        "segundos = segundos + excluded.segundos, "
+                        "ultima = max(ultima, excluded.ultima)",
+                        [key + value for key, value in pending.items()],
+                    )
+                    conn.execute(
+                        "DELETE FROM accesos WHERE ultima < ?",
+                        (time.time() - RETENTION_DAYS * 86400,),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("No se pudo escribir el registro de accesos %s: %s", self.path, e)
+
+    # Las `n` combinaciones más visitadas (desempate: más tiempo acumulado)
+    # como [(página, selecciones, visitas, segundos promedio)]
+    def top(self, n, pages=None):
+        self.flush()
+        if not os.path.exists(self.path):
+            return []
+        try:
+            conn = self._connect()
+            try:
+                sql = "SELECT pagina, seleccion, visitas, segundos FROM accesos"
+                params = []
+                if pages is not None:
+                    sql += f" WHERE pagina IN ({', '.join('?' * len(pages))})"
+                    params = list(pages)
+                sql += " ORDER BY visitas DESC, segundos DESC LIMIT ?"
+                rows = conn.execute(sql, params + [n]).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("No se pudo leer el registro de accesos %s: %s", self.path, e)
+            return []
+        return [
+            (page, json.loads(seleccion), visitas, segundos / visitas)
+            for page, seleccion, visitas, segundos in rows
+        ]
+
+
+# Una instancia por proceso (None si está desactivado); lo pendiente se
+# escribe al salir
+ACCESS_LOG = AccessLog(ACCESS_LOG_PATH) if ACCESS_LOG_PATH else None
+if ACCESS_LOG is not None:
+    atexit.register(ACCESS_LOG.flush)
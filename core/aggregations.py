@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+
+# Códigos enteros de una columna (-1 = vacío) y sus categorías en orden
+def _codes(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codes, uniques = pd.factorize(serie, sort=True)
+    return codes, uniques
+
+
+# Número de valores distintos de `values` por grupo (pares únicos grupo-valor)
+def _distinct_per_group(groups, values, num_groups):
+    valid = values >= 0
+    num_values = int(values.max()) + 1 if valid.any() else 1
+    pairs = np.unique(groups[valid].astype(np.int64) * num_values + values[valid])
+    return np.bincount(pairs // num_values, minlength=num_groups)
+
+
+# Métricas por carrera en una sola pasada sobre códigos factorizados:
+# instituciones distintas, suma de MATRICULADOS, países distintos y nivel modal.
+# `weights` indica cuántos registros representa cada fila (celdas del cubo).
+def career_metrics(df, weights=None):
+    carreras, categories = _codes(df["NOMBRE CARRERA"])
+    instituciones, _ = _codes(df["NOMBRE INSTITUCION"])
+    paises, _ = _codes(df["PAIS"])
+    niveles, nivel_values = _codes(df["NIVEL"])
+    matriculados = df["MATRICULADOS"].to_numpy()
+    registros = (
+        np.ones(len(df), dtype=np.int64) if weights is None else np.asarray(weights)
+    )
+
+    # Descartar filas sin carrera (groupby las omite)
+    valid = carreras >= 0
+    carreras = carreras[valid].astype(np.int64)
+    instituciones = instituciones[valid]
+    paises = paises[valid]
+    niveles = niveles[valid]
+    matriculados = matriculados[valid]
+    registros = registros[valid]
+
+    num_carreras = len(categories)
+    filas = np.bincount(carreras, minlength=num_carreras)
+
+    # Suma de MATRICULADOS (exacta para enteros < 2**53)
+    suma_validos = ~pd.isna(matriculados)
+    total = np.bincount(
+        carreras[suma_validos],
+        weights=matriculados[suma_validos].astype(np.float64),
+        minlength=num_carreras,
+    )
+    if np.issubdtype(matriculados.dtype, np.integer):
+        total = total.astype(np.int64)
+
+    num_instituciones = _distinct_per_group(carreras, instituciones, num_carreras)
+    num_paises = _distinct_per_group(carreras, paises, num_carreras)
+
+    # Nivel modal: matriz carrera x nivel de registros; empate -> primer nivel
+    num_niveles = max(len(nivel_values), 1)
+    con_nivel = niveles >= 0
+    conteo = np.bincount(
+        carreras[con_nivel] * num_niveles + niveles[con_nivel],
+        weights=registros[con_nivel],
+        minlength=num_carreras * num_niveles,
+    ).reshape(num_carreras, num_niveles)
+    modal = conteo.argmax(axis=1)
+    nivel_labels = np.array(list(nivel_values) + [np.nan], dtype=object)
+    modal[conteo.max(axis=1) <= 0] = len(nivel_values)
+
+    # Solo carreras presentes, en el orden de sus categorías
+    presentes = np.flatnonzero(filas > 0)
+    if isinstance(df["NOMBRE CARRERA"].dtype, pd.CategoricalDtype):
+        carrera_col = pd.Categorical.from_codes(
+            presentes, dtype=df["NOMBRE CARRERA"].dtype
+        )
+    else:
+        carrera_col = np.asarray(categories)[presentes]
+
+    return pd.DataFrame(
+        {
+            "CARRERA": carrera_col,
+            "NUM_INSTITUCIONES": num_instituciones[presentes].astype(np.int64),
+            "TOTAL_MATRICULADOS": total[presentes],
+            "NUM_PAISES": num_paises[presentes].astype(np.int64),
+            "NIVEL": pd.Series(nivel_labels[modal[presentes]], dtype=object),
+        }
+    )
+
+
+def truncate_label(label, max_len):
+    return label[:max_len] + "..." if len(label) > max_len else label
+
+
+# Top K por selección parcial (np.partition) en lugar de ordenar todo.
+# Desempate estable: a igual valor gana la etiqueta que aparece primero.
+# Devuelve las K filas en orden ascendente (listo para barras horizontales)
+# y solo trunca las etiquetas de las ganadoras.
+def top_k(df, label_col, value_col="MATRICULADOS", k=10, max_len=50):
+    values = df[value_col].to_numpy()
+    num_values = len(values)
+    if k <= 0 or num_values == 0:
+        return df.iloc[:0][[label_col, value_col]].copy()
+
+    if num_values > k:
+        kth = np.partition(values, num_values - k)[num_values - k]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(num_values)
+
+    # Orden descendente por valor y luego por posición; quedarse con K
+    winners = candidates[np.lexsort((candidates, -values[candidates]))][:k]
+    winners = winners[::-1]
+
+    top = pd.DataFrame(
+        {
+            label_col: [
+                truncate_label(label, max_len)
+                for label in df[label_col].iloc[winners].tolist()
+            ],
+            value_col: values[winners],
+        },
+        index=df.index[winners],
+    )
+    top[label_col] = top[label_col].astype(object)
+    return top
@@ -0,0 +1,388 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from core.cube import Cube
+from core.loader import (
+    DATA_DIR,
+    dataset_filter_columns,
+    dataset_version,
+    load_dataset,
+    write_atomic,
+)
+from core.queries import RANKING_SIZE
+from core.sources import ConnectionPool
+
+# Artefacto precalculado para servir sin leer los libros: un archivo SQLite
+# con las celdas del cubo, los totales de todas las combinaciones de filtros
+# y el top de cada ranking por combinación.
+#
+#   python -m core.artifact --data-dir db --output db/oferta.sqlite
+#
+#   OFERTA_ARTIFACT   ruta del artefacto (por defecto db/oferta.sqlite)
+# Si el artefacto existe y su versión coincide con la de los libros de
+# DATA_DIR (o no hay libros), las páginas arrancan desde él sin openpyxl.
+ARTIFACT_ENV = "OFERTA_ARTIFACT"
+ARTIFACT_PATH = os.path.join(DATA_DIR, "oferta.sqlite")
+
+# Incrementar cuando cambie el esquema del artefacto (2: modo de conteo en meta)
+ARTIFACT_FORMAT = 2
+
+# Rankings precalculados por dimensión
+RANKING_COLUMNS = ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+
+# Filas por lote al escribir las tablas
+INSERT_BATCH_ROWS = 50_000
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+CREATE TABLE categorias (
+    columna TEXT NOT NULL, codigo INTEGER NOT NULL, valor,
+    PRIMARY KEY (columna, codigo)
+);
+CREATE TABLE celdas (columna TEXT PRIMARY KEY, datos BLOB NOT NULL);
+CREATE TABLE totales (
+    combinacion INTEGER PRIMARY KEY, clave TEXT NOT NULL UNIQUE, matriculados,
+    instituciones INTEGER, carreras INTEGER, registros INTEGER
+);
+CREATE TABLE rankings (
+    combinacion INTEGER NOT NULL, columna TEXT NOT NULL,
+    codigos BLOB NOT NULL, posiciones BLOB NOT NULL, matriculados BLOB NOT NULL,
+    PRIMARY KEY (combinacion, columna)
+) WITHOUT ROWID;
+"""
+
+
+def artifact_path():
+    return os.environ.get(ARTIFACT_ENV, ARTIFACT_PATH)
+
+
+# Clave de texto de una combinación de filtros (None = "Todos")
+def _key_text(key):
+    return json.dumps(
+        [value.item() if isinstance(value, np.generic) else value for value in key],
+        ensure_ascii=False,
+    )
+
+
+def _connect_readonly(path, **kwargs):
+    return sqlite3.connect("file:" + os.path.abspath(path) + "?mode=ro", uri=True, **kwargs)
+
+
+# Top `k` de `column` para todas las combinaciones de filtros: por
+# combinación, las k filas de sum_by de mayor valor (empates por posición)
+# como (clave, códigos, posiciones en sum_by, valores). top_k sobre ellas da
+# el mismo resultado que sobre la tabla completa, para cualquier k menor o igual.
+def ranking_candidates(cube, column, k):
+    cells = cube.cells
+    for key_columns in _rollup_masks(cube.filter_columns):
+        grouped = (
+            cells.groupby(key_columns + [column], observed=True)["MATRICULADOS"]
+            .sum()
+            .reset_index()
+        )
+        if key_columns:
+            grupos = grouped.groupby(key_columns, observed=True, sort=False).ngroup()
+            grupos = grupos.to_numpy()
+        else:
+            grupos = np.zeros(len(grouped), dtype=np.int64)
+        values = grouped["MATRICULADOS"].to_numpy()
+        num_grupos = int(grupos.max()) + 1 if len(grupos) else 0
+
+        # Posición dentro de la combinación (grouped viene ordenado por clave)
+        inicio = np.searchsorted(grupos, np.arange(num_grupos))
+        posicion = (np.arange(len(grupos)) - inicio[grupos]).astype(np.int32)
+
+        # Puesto dentro de la combinación: valor descendente y luego posición
+        orden = np.lexsort((-values, grupos))
+        rango = np.empty(len(orden), dtype=np.int64)
+        rango[orden] = np.arange(len(orden)) - inicio[grupos[orden]]
+
+        # Filas del top agrupadas por combinación (grupos viene ordenado)
+        keep = np.flatnonzero(rango < k)
+        limites = np.searchsorted(grupos[keep], np.arange(num_grupos + 1))
+        codes = grouped[column].cat.codes.to_numpy(dtype=np.int32)
+        fixed = {col: grouped[col].take(inicio).tolist() for col in key_columns}
+        todos = [None] * num_grupos
+        claves = zip(*[fixed.get(col, todos) for col in cube.filter_columns])
+        for grupo, key in enumerate(claves):
+            rows = keep[limites[grupo] : limites[grupo + 1]]
+            yield key, codes[rows], posicion[rows], values[rows]
+
+
+def _rollup_masks(filter_columns):
+    for mask in itertools.product([False, True], repeat=len(filter_columns)):
+        yield [col for col, used in zip(filter_columns, mask) if used]
+
+
+def _insert(conn, table, rows):
+    rows = iter(rows)
+    while True:
+        batch = [row for _, row in zip(range(INSERT_BATCH_ROWS), rows)]
+        if not batch:
+            return
+        marks = ", ".join("?" * len(batch[0]))
+        conn.executemany(f"INSERT INTO {table} VALUES ({marks})", batch)
+
+
+# Escribir el artefacto de `df` (tabla normalizada de load_dataset). Los
+# totales se guardan siempre exactos, aunque OFERTA_APPROX_DISTINCT esté
+# activo: el artefacto no lleva sketches y load_artifact los sirve tal cual.
+def build_artifact(df, path=None, k=RANKING_SIZE):
+    path = path or artifact_path()
+    cube = Cube(df, dataset_filter_columns(df), approximate=False)
+    cells = cube.cells
+
+    def write(tmp_path):
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            meta = {
+                "formato": ARTIFACT_FORMAT,
+                "version": cube.version,
+                "filtros": cube.filter_columns,
+                "aproximado": cube.approximate,
+                "ranking_k": k,
+                "filas": len(df),
+                "matriculados": str(cells["MATRICULADOS"].dtype),
+                "categorias": {
+                    col: str(cells[col].cat.categories.dtype) for col in cube.dimensions
+                },
+                "creado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            _insert(conn, "meta", ((name, json.dumps(value)) for name, value in meta.items()))
+            _insert(
+                conn,
+                "categorias",
+                (
+                    (col, code, value)
+                    for col in cube.dimensions
+                    for code, value in enumerate(cells[col].cat.categories.tolist())
+                ),
+            )
+
+            # Celdas: un arreglo binario por columna (códigos int32 en las
+            # dimensiones); al cargar se leen sin conversión fila a fila
+            _insert(
+                conn,
+                "celdas",
+                [
+                    (col, cells[col].cat.codes.to_numpy(dtype=np.int32).tobytes())
+                    for col in cube.dimensions
+                ]
+                + [
+                    (col, np.ascontiguousarray(cells[col].to_numpy()).tobytes())
+                    for col in ["MATRICULADOS", "REGISTROS"]
+                ],
+            )
+
+            # Totales y rankings por combinación (id entero = orden en totales)
+            totals = cube.totals_items()
+            ids = {key: i for i, (key, _) in enumerate(totals)}
+            _insert(
+                conn,
+                "totales",
+                (
+                    (
+                        ids[key],
+                        _key_text(key),
+                        np.asarray(value["MATRICULADOS"]).item(),
+                        value["INSTITUCIONES"],
+                        value["CARRERAS"],
+                        value["REGISTROS"],
+                    )
+                    for key, value in totals
+                ),
+            )
+            for column in RANKING_COLUMNS:
+                _insert(
+                    conn,
+                    "rankings",
+                    (
+                        (
+                            ids[key],
+                            column,
+                            codes.tobytes(),
+                            posiciones.tobytes(),
+                            values.tobytes(),
+                        )
+                        for key, codes, posiciones, values in ranking_candidates(
+                            cube, column, k
+                        )
+                    ),
+                )
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    write_atomic(path, write)
+    return cube
+
+
+# Totales y rankings del artefacto, leídos bajo demanda por combinación con
+# conexiones de solo lectura. Para el cubo hace de diccionario de totales.
+class ArtifactTables:
+    def __init__(self, path, k, dtypes, matriculados_dtype):
+        self.k = k
+        self.dtypes = dtypes
+        self.matriculados_dtype = np.dtype(matriculados_dtype)
+        self.pool = ConnectionPool(
+            lambda: _connect_readonly(path, check_same_thread=False)
+        )
+
+    def _fetch_one(self, sql, params):
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    # Totales de la combinación `key` (interfaz de dict.get)
+    def get(self, key, default=None):
+        row = self._fetch_one(
+            "SELECT matriculados, instituciones, carreras, registros "
+            "FROM totales WHERE clave = ?",
+            (_key_text(key),),
+        )
+        if row is None:
+            return default
+        return dict(zip(["MATRICULADOS", "INSTITUCIONES", "CARRERAS", "REGISTROS"], row))
+
+    # Top de `column` para la combinación `key` (None si se pide más de k)
+    def rankings(self, column, key, k):
+        if k > self.k or column not in self.dtypes:
+            return None
+        row = self._fetch_one(
+            "SELECT r.codigos, r.posiciones, r.matriculados FROM rankings r "
+            "JOIN totales t ON t.combinacion = r.combinacion "
+            "WHERE t.clave = ? AND r.columna = ?",
+            (_key_text(key), column),
+        )
+        codes, posiciones, values = row or (b"", b"", b"")
+        return pd.DataFrame(
+            {
+                column: pd.Categorical.from_codes(
+                    np.frombuffer(codes, dtype=np.int32), dtype=self.dtypes[column]
+                ),
+                "MATRICULADOS": np.frombuffer(values, dtype=self.matriculados_dtype),
+            },
+            index=pd.Index(np.frombuffer(posiciones, dtype=np.int32), dtype=np.int64),
+        )
+
+
+# Cubo servido desde el artefacto: solo se cargan las celdas (para filtros y
+# métricas); totales y rankings se consultan por combinación
+def load_artifact(path=None):
+    path = path or artifact_path()
+    conn = _connect_readonly(path)
+    try:
+        meta = {name: json.loads(value) for name, value in conn.execute("SELECT * FROM meta")}
+        if meta.get("formato") != ARTIFACT_FORMAT:
+            raise ValueError(
+                f"Formato de artefacto {meta.get('formato')} (se esperaba {ARTIFACT_FORMAT})"
+            )
+        if meta["aproximado"]:
+            raise ValueError("Artefacto con conteos distintos aproximados")
+        filter_columns = meta["filtros"]
+        dimensions = filter_columns + ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+
+        values = {col: [] for col in dimensions}
+        for col, value in conn.execute(
+            "SELECT columna, valor FROM categorias ORDER BY columna, codigo"
+        ):
+            values[col].append(value)
+        dtypes = {
+            col: pd.CategoricalDtype(pd.Index(values[col], dtype=meta["categorias"][col]))
+            for col in dimensions
+        }
+
+        datos = dict(conn.execute("SELECT columna, datos FROM celdas"))
+    finally:
+        conn.close()
+
+    cells = pd.DataFrame(
+        {
+            col: pd.Categorical.from_codes(
+                np.frombuffer(datos[col], dtype=np.int32), dtype=dtypes[col]
+            )
+            for col in dimensions
+        }
+    )
+    cells["MATRICULADOS"] = np.frombuffer(datos["MATRICULADOS"], dtype=meta["matriculados"])
+    cells["REGISTROS"] = np.frombuffer(datos["REGISTROS"], dtype=np.int64)
+
+    tables = ArtifactTables(
+        path,
+        meta["ranking_k"],
+        {col: dtypes[col] for col in RANKING_COLUMNS},
+        meta["matriculados"],
+    )
+    cube = Cube.from_cells(cells, meta["version"], filter_columns, tables)
+    cube.rankings = tables.rankings
+    return cube
+
+
+# Versión de datos del artefacto (sin cargarlo)
+def artifact_version(path=None):
+    conn = _connect_readonly(path or artifact_path())
+    try:
+        row = conn.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise ValueError("Artefacto sin versión")
+    return json.loads(row[0])
+
+
+# Cubo del artefacto si existe y corresponde a los libros actuales (o no hay
+# libros); None para usar los libros
+def artifact_cube():
+    path = artifact_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        current = dataset_version()
+        if current is not None and current != artifact_version(path):
+            logger.warning("Artefacto %s desactualizado: se usan los libros", path)
+            return None
+        return load_artifact(path)
+    except (sqlite3.Error, ValueError, KeyError) as e:
+        logger.warning("No se pudo abrir el artefacto %s: %s", path, e)
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precalcula el artefacto que sirven las páginas"
+    )
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--ranking-size", type=int, default=RANKING_SIZE)
+    args = parser.parse_args(argv)
+
+    # Streamlit avisa que no hay contexto de ejecución al usar las cachés
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    output = args.output or artifact_path()
+
+    start = time.perf_counter()
+    df = load_dataset(args.data_dir)
+    cube = build_artifact(df, output, k=args.ranking_size)
+    print(
+        f"{output}: {len(df):,} filas, {len(cube.cells):,} celdas, "
+        f"{len(cube.totals_items()):,} combinaciones de filtros, "
+        f"{os.path.getsize(output) / 2**20:.1f} MB "
+        f"en {time.perf_counter() - start:.1f} s (versión {cube.version[:12]})"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.diskcache import DISK_CACHE
+from core.loader import freeze_frame
+
+# Límites de la caché de resultados compartida entre sesiones
+MAX_ENTRIES = 256
+TTL_SECONDS = 60 * 60
+
+
+# Caché LRU con expiración, compartida por todas las sesiones del proceso.
+# Las entradas se guardan por (versión del snapshot, clave): mientras conviven
+# dos versiones (peticiones o un precalentamiento que todavía usan la
+# anterior) cada una lee y escribe las suyas sin vaciar las de la otra; las de
+# versiones viejas salen por LRU o expiración. `l2` es un segundo nivel
+# opcional (get(version, key) -> (encontrado, valor), put(version, key,
+# valor)), p. ej. la caché en disco que comparten los procesos (core.diskcache).
+class ResultCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, l2=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.l2 = l2
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.l2_hits = 0
+
+    def get(self, version, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end((version, key))
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[(version, key)]
+                self.evictions += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, version, key, value):
+        with self._lock:
+            self._put((version, key), time.monotonic(), value)
+
+    def _put(self, entry_key, created, value):
+        self._entries[entry_key] = (created, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, version, key, compute):
+        found, value = self.get(version, key)
+        if found:
+            return value
+        if self.l2 is not None:
+            found, value = self.l2.get(version, key)
+            if found:
+                value = _freeze(value)
+                self.put(version, key, value)
+                with self._lock:
+                    self.l2_hits += 1
+                return value
+        value = compute()
+        self.put(version, key, value)
+        if self.l2 is not None:
+            self.l2.put(version, key, value)
+        return value
+
+    # Copiar a una nueva versión las entradas de la anterior que siguen
+    # válidas (`keep(clave)`). Las de la versión anterior se conservan para
+    # quien todavía la usa.
+    def rebase(self, old_version, new_version, keep):
+        with self._lock:
+            kept = [
+                (key, entry)
+                for (version, key), entry in self._entries.items()
+                if version == old_version and keep(key)
+            ]
+            for key, (created, value) in kept:
+                self._put((new_version, key), created, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self._entries),
+                "max_entradas": self.max_entries,
+                "aciertos": self.hits,
+                "fallos": self.misses,
+                "expulsiones": self.evictions,
+                "tasa_aciertos": self.hits / total if total else 0.0,
+                "aciertos_l2": self.l2_hits,
+                "versiones": len({version for version, _ in self._entries}),
+            }
+
+
+# Los resultados se guardan congelados y cada lector recibe su propia vista
+def _freeze(value):
+    if isinstance(value, pd.DataFrame):
+        return freeze_frame(value)
+    if isinstance(value, tuple):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _detach(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, tuple):
+        return tuple(_detach(item) for item in value)
+    return value
+
+
+RESULTS = ResultCache(l2=DISK_CACHE)
+
+
+# Decorador para funciones puras (cubo, selecciones) -> resultado.
+# La clave es la tupla de valores seleccionados en los filtros.
+def cached_query(func):
+    @functools.wraps(func)
+    def wrapper(source, selecciones):
+        key = (func.__name__, source.key(selecciones))
+        value = RESULTS.get_or_compute(
+            source.version, key, lambda: _freeze(func(source, selecciones))
+        )
+        return _detach(value)
+
+    return wrapper
@@ -0,0 +1,99 @@
+from html import escape
+
+import streamlit as st
+
+# Tarjetas de resumen de las páginas (HTML/CSS propio)
+
+# Degradados de fondo
+GRADIENTS = {
+    "azul": "#3b82f6 0%, #1d4ed8 100%",
+    "verde": "#10b981 0%, #34d399 100%",
+    "violeta": "#667eea 0%, #764ba2 100%",
+    "rosa": "#f093fb 0%, #f5576c 100%",
+    "ambar": "#fbbf24 0%, #f59e0b 100%",
+}
+
+# Tamaños (px) de la tarjeta grande (Dashboard) y de la compacta (resto)
+LARGE = {"padding": "24px 28px", "icon": 36, "label": 13, "value": 32, "gap": 10}
+COMPACT = {"padding": "20px 25px", "icon": 28, "label": 12, "value": 28, "gap": 8}
+
+
+# HTML de una tarjeta: icono, etiqueta, valor (ya formateado) y un detalle
+# opcional debajo. `value_size` cambia el tamaño del valor (nombres largos);
+# `height`/`min_height` fijan la altura para alinear tarjetas en una fila.
+def card_html(
+    icon,
+    label,
+    value,
+    color,
+    detail=None,
+    value_size=None,
+    height=None,
+    min_height=None,
+    large=False,
+):
+    size = LARGE if large else COMPACT
+    box = [
+        f"background: linear-gradient(135deg, {GRADIENTS[color]})",
+        f"padding: {size['padding']}",
+        "border-radius: 10px",
+        "box-shadow: 0 4px 12px rgba(0,0,0,0.1)",
+        "text-align: center",
+        "color: white",
+    ]
+    if height is not None or min_height is not None:
+        if height is not None:
+            box.append(f"height: {height}px")
+        if min_height is not None:
+            box.append(f"min-height: {min_height}px")
+        box += ["display: flex", "flex-direction: column", "justify-content: center"]
+
+    label_style = (
+        f"font-size: {size['label']}px; opacity: 0.95; "
+        f"margin-bottom: {size['gap'] - 2}px; font-weight: 500;"
+    )
+    if large:
+        label_style += " letter-spacing: 0.3px;"
+    value_style = f"font-size: {value_size or size['value']}px; font-weight: bold;"
+    if large or value_size is not None:
+        value_style += " line-height: 1.2;"
+    if value_size is not None:
+        value_style += " word-wrap: break-word;"
+
+    html = (
+        f'<div style="{"; ".join(box)};">'
+        f'<div style="font-size: {size["icon"]}px; margin-bottom: {size["gap"]}px;">{icon}</div>'
+        f'<div style="{label_style}">{escape(label)}</div>'
+        f'<div style="{value_style}">{escape(str(value))}</div>'
+    )
+    if detail is not None:
+        html += (
+            '<div style="font-size: 11px; opacity: 0.9; margin-top: 5px;">'
+            f"{escape(str(detail))}</div>"
+        )
+    return html + "</div>"
+
+
+# Dibujar una tarjeta en el contenedor actual
+def card(icon, label, value, color, **style):
+    st.markdown(card_html(icon, label, value, color, **style), unsafe_allow_html=True)
+
+
+# Valor de un conteo distinto de los totales ("≈" si es aproximado)
+def distinct_value(totales, name):
+    if totales[name] is None:
+        raise ValueError(
+            f"{name} sin calcular: totales de un cubo aproximado leídos como exactos"
+        )
+    if "ERROR_DISTINTOS" in totales:
+        return f"≈ {totales[name]:,}"
+    return totales[name]
+
+
+# Nota bajo las tarjetas cuando los conteos distintos son aproximados
+def approximate_note(totales):
+    if "ERROR_DISTINTOS" in totales:
+        st.caption(
+            "≈ Instituciones y carreras aproximadas (HyperLogLog), "
+            f"error típico ±{totales['ERROR_DISTINTOS']:.1%}"
+        )
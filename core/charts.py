@@ -0,0 +1,364 @@
+import hashlib
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.diskcache import DISK_CACHE
+
+# Figuras de las páginas. Se construyen una vez por contenido de los datos
+# agregados (huella de los valores) y se comparten entre sesiones:
+# st.plotly_chart solo lee la figura al serializarla. Plotly se importa al
+# construir la primera figura, no al importar el módulo. Con la caché en
+# disco (core.diskcache) la especificación JSON de cada figura también se
+# comparte entre procesos y reinicios.
+FIGURE_CACHE_ENTRIES = 64
+
+# "Versión" de las figuras en la caché en disco (la clave ya es el contenido)
+FIGURE_CACHE_VERSION = "figuras"
+
+# Estilo común de los títulos de los gráficos
+TITLE_FONT = {"size": 18, "color": "#1f77b4"}
+
+# Bubble chart con muchas carreras:
+#   OFERTA_WEBGL_MIN_POINTS    marcadores a partir de los cuales se usa WebGL
+#   OFERTA_MAX_BUBBLE_POINTS   carreras a partir de las cuales se agrupan las
+#                              de baja matrícula en una grilla (por nivel)
+# Valores de OFERTA_MAX_BUBBLE_POINTS menores que MIN_BUBBLE_POINTS se suben
+# a ese mínimo (con un aviso en el log): por debajo no caben las tres
+# ganadoras de las tarjetas más un grupo por nivel.
+WEBGL_MIN_POINTS = int(os.environ.get("OFERTA_WEBGL_MIN_POINTS", "1000"))
+MIN_BUBBLE_POINTS = 20
+MAX_BUBBLE_POINTS = int(os.environ.get("OFERTA_MAX_BUBBLE_POINTS", "2000"))
+BUBBLE_BINS = 20
+
+logger = logging.getLogger(__name__)
+
+if MAX_BUBBLE_POINTS < MIN_BUBBLE_POINTS:
+    logger.warning(
+        "OFERTA_MAX_BUBBLE_POINTS=%s es menor que el mínimo; se usa %s",
+        MAX_BUBBLE_POINTS,
+        MIN_BUBBLE_POINTS,
+    )
+    MAX_BUBBLE_POINTS = MIN_BUBBLE_POINTS
+
+
+# Huella del contenido de un DataFrame (valores, índice, columnas y tipos)
+def fingerprint(df):
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    digest.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+# Figura de la caché en disco o, si no está, construida con `build` y guardada
+def _stored_figure(key, build):
+    if DISK_CACHE is not None:
+        found, spec = DISK_CACHE.get(FIGURE_CACHE_VERSION, key)
+        if found:
+            import plotly.io as pio
+
+            return pio.from_json(spec, skip_invalid=True)
+    fig = build()
+    if DISK_CACHE is not None:
+        DISK_CACHE.put(FIGURE_CACHE_VERSION, key, fig.to_json())
+    return fig
+
+
+# Barras horizontales de un ranking (etiquetas en `label_col`, MATRICULADOS)
+def ranking_figure(df, label_col, title, yaxis_title):
+    return _ranking_figure(fingerprint(df), df, label_col, title, yaxis_title)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _ranking_figure(data_key, _df, label_col, title, yaxis_title):
+    return _stored_figure(
+        ("ranking", data_key, label_col, title, yaxis_title),
+        lambda: _build_ranking_figure(_df, label_col, title, yaxis_title),
+    )
+
+
+def _build_ranking_figure(df, label_col, title, yaxis_title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                y=df[label_col],
+                x=df["MATRICULADOS"],
+                orientation="h",
+                marker=dict(
+                    color=df["MATRICULADOS"],
+                    colorscale="Viridis",
+                    showscale=True,
+                    colorbar=dict(
+                        title="Total<br>Matriculados", thickness=15, len=0.7
+                    ),
+                ),
+                texttemplate="%{x:,}",
+                textposition="auto",
+                hovertemplate="<b>%{y}</b><br>Total Matriculados: %{x:,}<extra></extra>",
+            )
+        ]
+    )
+
+    fig.update_layout(
+        title={
+            "text": title,
+            "x": 0.5,
+            "xanchor": "center",
+            "font": TITLE_FONT,
+        },
+        xaxis_title="Total de Matriculados",
+        yaxis_title=yaxis_title,
+        height=max(400, len(df) * 30 + 100),
+        hovermode="closest",
+        margin=dict(l=300, r=50, t=100, b=50),
+        plot_bgcolor="rgba(240, 240, 240, 0.5)",
+        paper_bgcolor="white",
+        font=dict(family="Arial, sans-serif", size=12),
+        xaxis=dict(showgrid=True, gridwidth=1, gridcolor="lightgray", zeroline=False),
+        yaxis=dict(showgrid=False),
+    )
+    return fig
+
+
+# Bubble chart de carreras: instituciones vs matriculados, tamaño = países
+def bubble_figure(df_bubble):
+    return _bubble_figure(fingerprint(df_bubble), df_bubble)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _bubble_figure(data_key, _df_bubble):
+    return _stored_figure(("burbujas", data_key), lambda: _build_bubble_figure(_df_bubble))
+
+
+def _build_bubble_figure(df_bubble):
+    import plotly.graph_objects as go
+
+    # Escalado dinamico de burbujas para una vista general consistente
+    max_paises = max(1, int(df_bubble["NUM_PAISES"].max()))
+    num_burbujas = len(df_bubble)
+    if num_burbujas <= 25:
+        size_max = 60
+    elif num_burbujas <= 60:
+        size_max = 48
+    else:
+        size_max = 38
+    sizeref = 2.0 * max_paises / (size_max**2)
+
+    fig = go.Figure()
+
+    # Con demasiadas carreras, solo las destacadas se dibujan exactas
+    df_exactas, df_grupos = reduce_bubbles(df_bubble)
+    num_marcadores = len(df_exactas) + (0 if df_grupos is None else len(df_grupos))
+    scatter = go.Scattergl if num_marcadores >= WEBGL_MIN_POINTS else go.Scatter
+
+    # Agregar burbujas por cada nivel. El texto del tooltip lo arma Plotly a
+    # partir de customdata (sin formatear cadenas punto por punto)
+    for nivel in df_bubble["NIVEL"].unique():
+        df_nivel = df_exactas[df_exactas["NIVEL"] == nivel]
+
+        fig.add_trace(
+            scatter(
+                x=df_nivel["NUM_INSTITUCIONES"],
+                y=df_nivel["TOTAL_MATRICULADOS"],
+                mode="markers",
+                name=nivel,
+                marker=dict(
+                    size=df_nivel["NUM_PAISES"],
+                    color=(
+                        df_nivel["COLOR"].iloc[0] if len(df_nivel) > 0 else "#9ca3af"
+                    ),
+                    opacity=0.7,
+                    line=dict(width=2, color="white"),
+                    sizemode="area",
+                    sizeref=sizeref,
+                    sizemin=6,
+                ),
+                customdata=df_nivel[
+                    ["CARRERA_TRUNCADA", "NUM_INSTITUCIONES", "NUM_PAISES"]
+                ].to_numpy(dtype=object),
+                hovertemplate=(
+                    "<b>%{customdata[0]}</b><br>"
+                    "Instituciones: %{customdata[1]}<br>"
+                    "Matriculados: %{y:,}<br>"
+                    "Países: %{customdata[2]}<br>"
+                    f"Nivel: {nivel}"
+                    "<extra></extra>"
+                ),
+            )
+        )
+
+        if df_grupos is not None:
+            grupos = df_grupos[df_grupos["NIVEL"] == nivel]
+            if len(grupos) > 0:
+                fig.add_trace(
+                    scatter(
+                        x=grupos["NUM_INSTITUCIONES"],
+                        y=grupos["TOTAL_MATRICULADOS"],
+                        mode="markers",
+                        name=f"{nivel} (agrupadas)",
+                        marker=dict(
+                            size=grupos["NUM_PAISES"],
+                            color=grupos["COLOR"].iloc[0],
+                            symbol="square",
+                            opacity=0.35,
+                            sizemode="area",
+                            sizeref=sizeref,
+                            sizemin=4,
+                        ),
+                        customdata=grupos[
+                            ["CARRERAS", "INSTITUCIONES", "MATRICULADOS", "NUM_PAISES"]
+                        ].to_numpy(dtype=object),
+                        hovertemplate=(
+                            "<b>%{customdata[0]} carreras agrupadas</b><br>"
+                            "Instituciones: %{customdata[1]}<br>"
+                            "Matriculados: %{customdata[2]}<br>"
+                            "Países (máx.): %{customdata[3]}<br>"
+                            f"Nivel: {nivel}"
+                            "<extra></extra>"
+                        ),
+                    )
+                )
+
+    # Calcular rangos con padding para mejor visualización
+    x_min, x_max = (
+        df_bubble["NUM_INSTITUCIONES"].min(),
+        df_bubble["NUM_INSTITUCIONES"].max(),
+    )
+
+    # Agregar padding del 20% en cada lado
+    x_padding = max(1, (x_max - x_min) * 0.2)
+
+    fig.update_layout(
+        title={
+            "text": "Análisis de Carreras: Instituciones vs Matriculados vs Países",
+            "x": 0.5,
+            "xanchor": "center",
+            "font": TITLE_FONT,
+        },
+        xaxis_title="Número de Instituciones",
+        yaxis_title="Total de Matriculados (escala logarítmica)",
+        height=700,
+        hovermode="closest",
+        plot_bgcolor="rgba(240, 240, 240, 0.5)",
+        paper_bgcolor="white",
+        font=dict(family="Arial, sans-serif", size=12),
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor="lightgray",
+            zeroline=False,
+            type="linear",
+            range=[max(0, x_min - x_padding), x_max + x_padding],
+            autorange=False,
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor="lightgray",
+            zeroline=False,
+            type="log",
+            autorange=True,
+        ),
+        margin=dict(l=100, r=100, t=100, b=100),
+        showlegend=False,
+    )
+
+    if df_grupos is not None:
+        fig.add_annotation(
+            text=(
+                f"{int(df_grupos['CARRERAS'].sum()):,} carreras de menor matrícula "
+                f"agrupadas en {len(df_grupos):,} marcadores (■)"
+            ),
+            xref="paper",
+            yref="paper",
+            x=0,
+            y=-0.12,
+            showarrow=False,
+            font=dict(size=11, color="#6b7280"),
+        )
+    return fig
+
+
+# Reducción en el servidor del bubble chart. Hasta `max_points` carreras se
+# dibujan todas. Si hay más, quedan exactas las de mayor matrícula (incluida
+# la "Carrera Estrella") y las que más destacan en instituciones y países; el
+# resto se agrupa por nivel en una grilla de hasta `bins` x `bins` sobre
+# instituciones y log10(matriculados), más chica si hace falta para que
+# exactas y grupos no pasen de `max_points` (como mínimo MIN_BUBBLE_POINTS).
+# Devuelve (exactas, grupos o None).
+def reduce_bubbles(df_bubble, max_points=None, bins=BUBBLE_BINS):
+    max_points = MAX_BUBBLE_POINTS if max_points is None else max_points
+    max_points = max(max_points, MIN_BUBBLE_POINTS)
+    if len(df_bubble) <= max_points:
+        return df_bubble, None
+
+    exactas = max_points // 2
+    destacadas = max(1, exactas // 10)
+    keep = np.zeros(len(df_bubble), dtype=bool)
+    for col, count in [
+        ("TOTAL_MATRICULADOS", exactas - 2 * destacadas),
+        ("NUM_INSTITUCIONES", destacadas),
+        ("NUM_PAISES", destacadas),
+    ]:
+        values = df_bubble[col].to_numpy()
+        if count > 0:
+            keep[np.argpartition(-values, count - 1)[:count]] = True
+        # Ganadoras de las tarjetas (primera en caso de empate)
+        keep[int(np.argmax(values))] = True
+
+    resto = df_bubble[~keep]
+    niveles = max(resto["NIVEL"].nunique(dropna=False), 1)
+    bins = min(bins, max(1, math.isqrt((max_points - int(keep.sum())) // niveles)))
+    x = resto["NUM_INSTITUCIONES"].to_numpy(dtype=np.float64)
+    y = np.log10(np.maximum(resto["TOTAL_MATRICULADOS"].to_numpy(dtype=np.float64), 1))
+    celdas = pd.DataFrame(
+        {
+            "NIVEL": resto["NIVEL"].to_numpy(),
+            "COLOR": resto["COLOR"].to_numpy(),
+            "BIN_X": _bin(x, bins),
+            "BIN_Y": _bin(y, bins),
+            "NUM_INSTITUCIONES": x,
+            "TOTAL_MATRICULADOS": resto["TOTAL_MATRICULADOS"].to_numpy(),
+            "NUM_PAISES": resto["NUM_PAISES"].to_numpy(),
+        }
+    )
+    grupos = (
+        celdas.groupby(["NIVEL", "COLOR", "BIN_X", "BIN_Y"], dropna=False, sort=False)
+        .agg(
+            CARRERAS=("NUM_INSTITUCIONES", "size"),
+            X_MEDIA=("NUM_INSTITUCIONES", "mean"),
+            X_MIN=("NUM_INSTITUCIONES", "min"),
+            X_MAX=("NUM_INSTITUCIONES", "max"),
+            Y_MEDIA=("TOTAL_MATRICULADOS", "mean"),
+            Y_MIN=("TOTAL_MATRICULADOS", "min"),
+            Y_MAX=("TOTAL_MATRICULADOS", "max"),
+            NUM_PAISES=("NUM_PAISES", "max"),
+        )
+        .reset_index()
+    )
+    grupos["NUM_INSTITUCIONES"] = grupos["X_MEDIA"]
+    grupos["TOTAL_MATRICULADOS"] = grupos["Y_MEDIA"]
+    grupos["INSTITUCIONES"] = _rango(grupos["X_MIN"], grupos["X_MAX"])
+    grupos["MATRICULADOS"] = _rango(grupos["Y_MIN"], grupos["Y_MAX"])
+    return df_bubble[keep], grupos
+
+
+def _bin(values, bins):
+    low, high = values.min(), values.max()
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int16)
+    scaled = (values - low) / (high - low) * bins
+    return np.minimum(scaled.astype(np.int16), bins - 1)
+
+
+# Rango "mín–máx" con separador de miles (un solo valor si coinciden)
+def _rango(low, high):
+    low = low.astype(np.int64).map("{:,}".format)
+    high = high.astype(np.int64).map("{:,}".format)
+    return low.where(low == high, low + "–" + high)
@@ -0,0 +1,338 @@
+import itertools
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.aggregations import career_metrics
+from core.cache import RESULTS
+from core.delta import diff_tables
+from core.index import FilterIndex
+from core.loader import FILTER_COLUMNS, dataset_filter_columns, freeze_frame
+from core.sketch import DEFAULT_PRECISION, DistinctSketches, hash_values
+
+EMPTY_TOTALS = {"MATRICULADOS": 0, "INSTITUCIONES": 0, "CARRERAS": 0, "REGISTROS": 0}
+
+# En modo aproximado los totales guardados no llevan conteos distintos (los
+# calcula totals() con los sketches): None, nunca un 0 que parezca un conteo
+APPROXIMATE_EMPTY_TOTALS = dict(EMPTY_TOTALS, INSTITUCIONES=None, CARRERAS=None)
+
+# Recarga incremental: si cambian pocas filas se aplica el delta al cubo
+INCREMENTAL_RELOAD = True
+MAX_DELTA_FRACTION = 0.2
+
+# Conteos distintos de las tarjetas (instituciones y carreras):
+#   OFERTA_APPROX_DISTINCT=1     aproximados con HyperLogLog por celda de
+#                                filtros (sin roll-ups de nunique al construir)
+#   OFERTA_SKETCH_PRECISION      bits de registro del sketch (error ±1.04/√2^p)
+# Sin la variable los conteos son exactos.
+APPROXIMATE_DISTINCT = os.environ.get("OFERTA_APPROX_DISTINCT") == "1"
+SKETCH_PRECISION = int(os.environ.get("OFERTA_SKETCH_PRECISION", DEFAULT_PRECISION))
+
+# Conteos distintos de los totales y la columna de la que salen
+DISTINCT_COUNTS = {"INSTITUCIONES": "NOMBRE INSTITUCION", "CARRERAS": "NOMBRE CARRERA"}
+
+
+# Cubo pre-agregado: suma de MATRICULADOS y número de registros por celda,
+# con totales precalculados para cada combinación de filtros (incluido "Todos").
+# En modo aproximado los conteos distintos salen de sketches por celda de
+# filtros en lugar de roll-ups exactos.
+class Cube:
+    # `index` y `sketches` (filter_cells, filter_index, sketches) permiten
+    # reutilizar estructuras ya construidas (core.shared)
+    def __init__(
+        self,
+        df,
+        filter_columns=FILTER_COLUMNS,
+        cells=None,
+        totals=None,
+        approximate=None,
+        index=None,
+        sketches=None,
+    ):
+        self.version = df.attrs.get("version")
+        self.filter_columns = list(filter_columns)
+        self.approximate = APPROXIMATE_DISTINCT if approximate is None else approximate
+        self.dimensions = self.filter_columns + ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+
+        if cells is None:
+            cells = (
+                df.groupby(self.dimensions, observed=True, dropna=False)
+                .agg(
+                    MATRICULADOS=("MATRICULADOS", "sum"),
+                    REGISTROS=("MATRICULADOS", "size"),
+                )
+                .reset_index()
+            )
+        # Las sumas por celda se guardan en int64 (evita desbordes al re-agregar)
+        if pd.api.types.is_integer_dtype(cells["MATRICULADOS"]):
+            cells["MATRICULADOS"] = cells["MATRICULADOS"].astype("int64")
+        self.cells = freeze_frame(cells)
+        self.index = FilterIndex(self.cells, self.dimensions) if index is None else index
+        if self.approximate and sketches is None:
+            self._build_sketches()
+        elif self.approximate:
+            self.filter_cells, self.filter_index, self.sketches = sketches
+        self._totals = self._build_rollups() if totals is None else totals
+        # Candidatos precalculados de los rankings (artefacto), o None
+        self.rankings = None
+
+    # Cubo a partir de celdas y totales exactos ya calculados (artefacto)
+    @classmethod
+    def from_cells(cls, cells, version, filter_columns, totals):
+        df = pd.DataFrame()
+        df.attrs["version"] = version
+        return cls(df, filter_columns, cells=cells, totals=totals, approximate=False)
+
+    # Sketches de instituciones y carreras por celda de filtros, con un
+    # índice sobre las celdas de filtros para elegir las de una selección
+    def _build_sketches(self):
+        grouped = self.cells.groupby(
+            self.filter_columns, observed=True, dropna=False, sort=False
+        )
+        groups = grouped.ngroup().to_numpy()
+        num_groups = grouped.ngroups
+        first = np.unique(groups, return_index=True)[1]
+        self.filter_cells = self.cells[self.filter_columns].iloc[first].reset_index(drop=True)
+        self.filter_index = FilterIndex(self.filter_cells, self.filter_columns)
+        self.sketches = {
+            name: DistinctSketches(
+                groups, *hash_values(self.cells[col]), num_groups, SKETCH_PRECISION
+            )
+            for name, col in DISTINCT_COUNTS.items()
+        }
+
+    # Totales para los 2^5 niveles de agregación ("Todos" = None). En modo
+    # aproximado no se calculan conteos distintos (quedan en None; los da
+    # totals())
+    def _build_rollups(self):
+        totals = {}
+        for mask in itertools.product([False, True], repeat=len(self.filter_columns)):
+            keys = [col for col, used in zip(self.filter_columns, mask) if used]
+            if keys:
+                grouped = self.cells.groupby(keys, observed=True)
+                rollup = pd.DataFrame(
+                    {
+                        "MATRICULADOS": grouped["MATRICULADOS"].sum(),
+                        "INSTITUCIONES": None
+                        if self.approximate
+                        else grouped["NOMBRE INSTITUCION"].nunique(),
+                        "CARRERAS": None
+                        if self.approximate
+                        else grouped["NOMBRE CARRERA"].nunique(),
+                        "REGISTROS": grouped["REGISTROS"].sum(),
+                    }
+                )
+                items = rollup.itertuples(index=True, name=None)
+            else:
+                items = [
+                    (
+                        (),
+                        self.cells["MATRICULADOS"].sum(),
+                        None if self.approximate else self.cells["NOMBRE INSTITUCION"].nunique(),
+                        None if self.approximate else self.cells["NOMBRE CARRERA"].nunique(),
+                        self.cells["REGISTROS"].sum(),
+                    )
+                ]
+
+            for key, matriculados, instituciones, carreras, registros in items:
+                values = iter(key if isinstance(key, tuple) else (key,))
+                cell = tuple(next(values) if used else None for used in mask)
+                totals[cell] = {
+                    "MATRICULADOS": matriculados,
+                    "INSTITUCIONES": None if self.approximate else int(instituciones),
+                    "CARRERAS": None if self.approximate else int(carreras),
+                    "REGISTROS": int(registros),
+                }
+        return totals
+
+    # Nuevo cubo con el delta aplicado: se ajustan solo las celdas tocadas y
+    # los totales de las combinaciones afectadas, sin re-agregar la tabla
+    def apply_delta(self, delta, df):
+        dimensions = self.dimensions
+        changes = delta.contributions(dimensions)
+
+        matriculados = self.cells["MATRICULADOS"].to_numpy().copy()
+        registros = self.cells["REGISTROS"].to_numpy().copy()
+        new_cells = []
+        flipped = []  # celdas que aparecen o desaparecen
+        for values, delta_matriculados, delta_registros in changes:
+            rows = self.index.match(dict(zip(dimensions, values)))
+            if len(rows):
+                position = rows[0]
+                matriculados[position] += delta_matriculados
+                registros[position] += delta_registros
+                if registros[position] <= 0:
+                    flipped.append(values)
+            elif delta_registros > 0:
+                new_cells.append(values + (delta_matriculados, delta_registros))
+                flipped.append(values)
+
+        keep = registros > 0
+        cells = self.cells[keep].assign(
+            MATRICULADOS=matriculados[keep], REGISTROS=registros[keep]
+        )
+        # Recodificar al diccionario de la nueva versión (solo remapea códigos)
+        dtypes = {col: df[col].dtype for col in dimensions}
+        cells = cells.astype(dtypes)
+        if new_cells:
+            added = pd.DataFrame(
+                new_cells, columns=dimensions + ["MATRICULADOS", "REGISTROS"]
+            ).astype(dtypes)
+            cells = pd.concat([cells, added], ignore_index=True)
+        cube = Cube(
+            df,
+            self.filter_columns,
+            cells=cells.reset_index(drop=True),
+            totals={},
+            approximate=self.approximate,
+        )
+
+        # Sumas y registros: aplicar los aportes a cada combinación de filtros
+        totals = dict(self._totals)
+        num_filters = len(self.filter_columns)
+        empty = APPROXIMATE_EMPTY_TOTALS if self.approximate else EMPTY_TOTALS
+        for values, delta_matriculados, delta_registros in changes:
+            for key in _rollup_keys(values[:num_filters]):
+                current = totals.get(key, empty)
+                totals[key] = dict(
+                    current,
+                    MATRICULADOS=current["MATRICULADOS"] + delta_matriculados,
+                    REGISTROS=current["REGISTROS"] + delta_registros,
+                )
+
+        # Conteos distintos: solo cambian si un par (combinación, institución)
+        # o (combinación, carrera) pasa a existir o deja de existir. En modo
+        # aproximado el cubo nuevo ya reconstruyó sus sketches.
+        pairs = {}
+        for values in [] if self.approximate else flipped:
+            carrera, institucion = values[num_filters:]
+            keys = list(_rollup_keys(values[:num_filters]))
+            if institucion is not None:
+                pairs.setdefault(("NOMBRE INSTITUCION", institucion), set()).update(keys)
+            if carrera is not None:
+                pairs.setdefault(("NOMBRE CARRERA", carrera), set()).update(keys)
+        counters = {"NOMBRE INSTITUCION": "INSTITUCIONES", "NOMBRE CARRERA": "CARRERAS"}
+        for (col, value), keys in pairs.items():
+            keys = list(keys)
+            before = self.index.exists_many(self.filter_columns, keys, col, value)
+            after = cube.index.exists_many(self.filter_columns, keys, col, value)
+            counter = counters[col]
+            for key, change in zip(keys, after.astype(int) - before.astype(int)):
+                if change:
+                    totals[key] = dict(
+                        totals[key], **{counter: totals[key][counter] + int(change)}
+                    )
+
+        # Combinaciones que se quedaron sin registros
+        for key in [key for key, value in totals.items() if value["REGISTROS"] <= 0]:
+            del totals[key]
+
+        cube._totals = totals
+        return cube
+
+    # Pares (clave, totales) de todas las combinaciones de filtros (para
+    # guardarlos: core.artifact, core.shared)
+    def totals_items(self):
+        return self._totals.items()
+
+    # Clave de una selección: tupla de valores, None = "Todos"
+    def key(self, selections):
+        return tuple(selections.get(col) for col in self.filter_columns)
+
+    # Total matriculados, instituciones y carreras distintas para una selección.
+    # En modo aproximado incluye ERROR_DISTINTOS (error relativo típico).
+    def totals(self, selections):
+        totals = self._totals.get(self.key(selections), EMPTY_TOTALS)
+        if not self.approximate:
+            return totals
+        groups = self.filter_index.select(selections)
+        totals = dict(totals)
+        for name, sketches in self.sketches.items():
+            totals[name] = sketches.count(groups) if totals["REGISTROS"] > 0 else 0
+            totals["ERROR_DISTINTOS"] = sketches.error
+        return totals
+
+    # Opciones de un filtro dentro de la selección de los niveles anteriores
+    def options(self, column, selections, exclude=()):
+        rows = self.index.select(selections)
+        return self.index.options(column, rows, exclude=exclude)
+
+    # Celdas que cumplen la selección
+    def select(self, selections):
+        rows = self.index.select(selections)
+        return self.cells if rows is None else self.cells.take(rows)
+
+    # Suma de MATRICULADOS por una dimensión dentro de la selección
+    def sum_by(self, column, selections):
+        return self.select(selections).groupby(
+            column, as_index=False, observed=True
+        )["MATRICULADOS"].sum()
+
+    # Filas de sum_by que pueden entrar en el top `k` (mismo orden e índice)
+    def top_candidates(self, column, selections, k):
+        if self.rankings is not None:
+            candidates = self.rankings(column, self.key(selections), k)
+            if candidates is not None:
+                return candidates
+        return self.sum_by(column, selections)
+
+    # Métricas por carrera para el gráfico de burbujas
+    def career_metrics(self, selections):
+        cells = self.select(selections)
+        return career_metrics(cells, weights=cells["REGISTROS"].to_numpy())
+
+
+# Claves de totales que incluyen una combinación de valores de filtro:
+# cada columna puede quedar fija o en "Todos". Los vacíos solo caen en "Todos".
+def _rollup_keys(values):
+    options = [(None,) if value is None else (value, None) for value in values]
+    return itertools.product(*options)
+
+
+# ¿La selección `key` (None = "Todos") incluye alguna combinación tocada?
+def _matches_any(key, touched):
+    return any(
+        all(k is None or k == v for k, v in zip(key, values)) for values in touched
+    )
+
+
+# Último cubo construido, base para la recarga incremental
+_current = {}
+_current_lock = threading.Lock()
+
+
+# Cubo de una versión: aplicando el delta al último cubo construido si
+# cambiaron pocas filas, o desde cero
+def build_cube(version, df):
+    filter_columns = dataset_filter_columns(df)
+    with _current_lock:
+        previous = _current.get("cube")
+        if (
+            previous is not None
+            and previous.version == version
+            and previous.filter_columns == filter_columns
+        ):
+            return previous
+        cube = None
+        if (
+            INCREMENTAL_RELOAD
+            and previous is not None
+            and previous.version != version
+            and previous.filter_columns == filter_columns
+        ):
+            delta = diff_tables(_current["df"], df)
+            if delta.size <= MAX_DELTA_FRACTION * max(len(df), 1):
+                cube = previous.apply_delta(delta, df)
+                # Conservar resultados en caché de combinaciones no tocadas
+                touched = delta.touched(previous.filter_columns)
+                RESULTS.rebase(
+                    previous.version,
+                    version,
+                    lambda key: not _matches_any(key[1], touched),
+                )
+        if cube is None:
+            cube = Cube(df, filter_columns)
+        _current.update(version=version, df=df, cube=cube)
+    return cube
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from core.loader import FILTER_COLUMNS, PARTITION_COLUMN
+
+# Clave estable de una fila del libro (más la partición, si existe)
+ROW_KEY = ["NOMBRE INSTITUCION", "NOMBRE CARRERA", "PAIS", "NIVEL"]
+
+
+# Cambios entre dos versiones de la tabla: filas agregadas, eliminadas y
+# modificadas (versión anterior y nueva de cada fila modificada)
+class Delta:
+    def __init__(self, added, removed, changed_old, changed_new):
+        self.added = added
+        self.removed = removed
+        self.changed_old = changed_old
+        self.changed_new = changed_new
+
+    @property
+    def size(self):
+        return len(self.added) + len(self.removed) + len(self.changed_new)
+
+    # Aportes con signo agrupados por `columns`: (valores, Δmatriculados, Δregistros)
+    def contributions(self, columns):
+        outgoing = pd.concat([self.removed, self.changed_old])
+        incoming = pd.concat([self.added, self.changed_new])
+        rows = pd.concat(
+            [
+                _as_object(outgoing[columns]).assign(
+                    MATRICULADOS=-outgoing["MATRICULADOS"].to_numpy(), REGISTROS=-1
+                ),
+                _as_object(incoming[columns]).assign(
+                    MATRICULADOS=incoming["MATRICULADOS"].to_numpy(), REGISTROS=1
+                ),
+            ],
+            ignore_index=True,
+        )
+        grouped = rows.groupby(columns, dropna=False, sort=False)[
+            ["MATRICULADOS", "REGISTROS"]
+        ].sum()
+        contributions = []
+        for key, matriculados, registros in grouped.itertuples(name=None):
+            key = key if isinstance(key, tuple) else (key,)
+            values = tuple(None if pd.isna(v) else v for v in key)
+            contributions.append((values, matriculados, registros))
+        return contributions
+
+    # Combinaciones de valores de filtro tocadas por el cambio
+    def touched(self, filter_columns=FILTER_COLUMNS):
+        frames = [self.added, self.removed, self.changed_old, self.changed_new]
+        rows = pd.concat([_as_object(frame[filter_columns]) for frame in frames])
+        return set(rows.itertuples(index=False, name=None))
+
+
+def _as_object(df):
+    df = df.astype(object)
+    return df.where(df.notna(), None)
+
+
+def _row_ids(df):
+    key = ROW_KEY + [PARTITION_COLUMN] if PARTITION_COLUMN in df.columns else ROW_KEY
+    key_hash = pd.util.hash_pandas_object(df[key], index=False).to_numpy()
+    ids = pd.DataFrame(
+        {
+            "clave": key_hash,
+            "fila": pd.util.hash_pandas_object(df, index=False).to_numpy(),
+            "posicion": np.arange(len(df)),
+        }
+    )
+    # Las claves repetidas se emparejan por orden de aparición
+    ids["ocurrencia"] = ids.groupby("clave").cumcount()
+    return ids
+
+
+# Comparar dos tablas por ROW_KEY usando hashes de valores (no de códigos),
+# así las categorías de cada versión pueden diferir
+def diff_tables(old, new):
+    merged = _row_ids(old).merge(
+        _row_ids(new),
+        on=["clave", "ocurrencia"],
+        how="outer",
+        suffixes=("_old", "_new"),
+        indicator=True,
+    )
+    removed = merged["_merge"] == "left_only"
+    added = merged["_merge"] == "right_only"
+    changed = (merged["_merge"] == "both") & (merged["fila_old"] != merged["fila_new"])
+
+    def rows(df, mask, suffix):
+        return df.iloc[merged.loc[mask, f"posicion{suffix}"].astype(np.int64).to_numpy()]
+
+    return Delta(
+        added=rows(new, added, "_new"),
+        removed=rows(old, removed, "_old"),
+        changed_old=rows(old, changed, "_old"),
+        changed_new=rows(new, changed, "_new"),
+    )
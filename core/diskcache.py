@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from core.loader import DATA_DIR
+from core.sources import ConnectionPool
+
+# Segundo nivel de la caché de resultados (core.cache) y de las figuras
+# (core.charts): un archivo SQLite local que comparten todos los procesos y
+# réplicas de la máquina y que sobrevive a los reinicios.
+#   OFERTA_DISK_CACHE      ruta del archivo (vacío = sin caché en disco)
+#   OFERTA_DISK_CACHE_MB   tamaño máximo de los valores; al superarlo se
+#                          expulsan las entradas usadas hace más tiempo
+#   OFERTA_DISK_CACHE_TTL  segundos de vida de cada entrada desde que se
+#                          escribió (0 = sin vencimiento)
+# Las claves incluyen la versión de los datos y una huella del código y la
+# configuración, así nunca se leen resultados de otra versión. Los valores se
+# guardan con pickle comprimido: solo se leen valores que escribió la propia
+# aplicación en un archivo local.
+DISK_CACHE_ENV = "OFERTA_DISK_CACHE"
+DISK_CACHE_PATH = os.environ.get(
+    DISK_CACHE_ENV, os.path.join(DATA_DIR, ".cache", "resultados.sqlite")
+)
+DISK_CACHE_MB = int(os.environ.get("OFERTA_DISK_CACHE_MB", "256"))
+DISK_CACHE_TTL = float(os.environ.get("OFERTA_DISK_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Incrementar cuando cambie el formato de los valores o la tabla de entradas
+# (2: hora de creación). La versión de pandas también invalida la caché (los
+# DataFrames se guardan con pickle).
+DISK_CACHE_FORMAT = 2
+
+# Al pasar del máximo se expulsa hasta quedar en esta fracción
+EVICT_TO = 0.9
+
+# La hora de último uso se actualiza como mucho una vez por este intervalo
+# (segundos): las lecturas casi nunca escriben
+TOUCH_INTERVAL = 60
+
+# Segundos de espera si otro proceso está escribiendo
+BUSY_TIMEOUT = 5
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entradas (
+    clave TEXT PRIMARY KEY, valor BLOB NOT NULL,
+    bytes INTEGER NOT NULL, usado REAL NOT NULL, creado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_usado ON entradas (usado);
+"""
+
+
+# Huella del código de core/ y de la configuración OFERTA_*: los resultados
+# dependen de ambos, así un despliegue nuevo (o réplicas con otra
+# configuración) no lee entradas que ya no le corresponden
+def code_fingerprint():
+    digest = hashlib.blake2b(digest_size=8)
+    core_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(core_dir)):
+        if name.endswith(".py"):
+            with open(os.path.join(core_dir, name), "rb") as f:
+                digest.update(name.encode() + b"\0" + f.read())
+    for name, value in sorted(os.environ.items()):
+        if name.startswith("OFERTA_") and not name.startswith(DISK_CACHE_ENV):
+            digest.update(f"{name}={value}\0".encode())
+    return digest.hexdigest()
+
+
+# Clave de texto de (huella, versión, clave)
+def _key_text(namespace, version, key):
+    return json.dumps(
+        [namespace, version, key],
+        ensure_ascii=False,
+        default=lambda value: value.item() if isinstance(value, np.generic) else str(value),
+    )
+
+
+def dumps(value):
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def loads(blob):
+    return pickle.loads(zlib.decompress(blob))
+
+
+# Caché clave -> valor en SQLite con expulsión por tamaño (la menos usada
+# recientemente) y vencimiento por entrada (`ttl` segundos, 0 = nunca).
+# Cualquier error de disco se registra y cuenta como fallo: la página nunca
+# depende de la caché.
+class DiskCache:
+    def __init__(self, path, max_bytes, ttl=DISK_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.pool = ConnectionPool(self._connect)
+        self._format = json.dumps([DISK_CACHE_FORMAT, pd.__version__])
+        self.namespace = code_fingerprint()
+        self._checked = False
+        self._lock = threading.Lock()
+        self._written = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        with self._lock:
+            if not self._checked:
+                self._check_format(conn)
+                self._checked = True
+        return conn
+
+    # Vaciar la caché si la escribió otro formato u otra versión de pandas (la
+    # tabla de entradas se vuelve a crear por si cambiaron sus columnas)
+    def _check_format(self, conn):
+        row = conn.execute("SELECT valor FROM meta WHERE clave = 'formato'").fetchone()
+        if row is not None and row[0] == self._format:
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DROP TABLE entradas")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('formato', ?)", (self._format,)
+            )
+        conn.executescript(SCHEMA)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, version, key):
+        clave = _key_text(self.namespace, version, key)
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT valor, usado, creado FROM entradas WHERE clave = ?", (clave,)
+                ).fetchone()
+                now = time.time()
+                if row is not None and self.ttl and now - row[2] > self.ttl:
+                    conn.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+                    row = None
+                if row is None:
+                    self._count("misses")
+                    return False, None
+                if now - row[1] > TOUCH_INTERVAL:
+                    conn.execute(
+                        "UPDATE entradas SET usado = ? WHERE clave = ?", (now, clave)
+                    )
+            value = loads(row[0])
+        except Exception as e:
+            # Incluye valores ilegibles (p. ej. escritos por otra versión)
+            self._count("errors")
+            logger.warning("Caché en disco: no se pudo leer %s: %s", clave, e)
+            return False, None
+        self._count("hits")
+        return True, value
+
+    def put(self, version, key, value):
+        clave = _key_text(self.namespace, version, key)
+        try:
+            blob = dumps(value)
+            now = time.time()
+            with self.pool.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?)",
+                    (clave, blob, len(blob), now, now),
+                )
+                with self._lock:
+                    self._written += len(blob)
+                    check = self._written >= (1 - EVICT_TO) * self.max_bytes
+                    if check:
+                        self._written = 0
+                if check:
+                    self._evict(conn)
+        except Exception as e:
+            self._count("errors")
+            logger.warning("Caché en disco: no se pudo escribir %s: %s", clave, e)
+
+    # Expulsar las entradas vencidas y luego las usadas hace más tiempo hasta
+    # quedar en EVICT_TO del máximo (se revisa cada vez que se escribió ~10 %
+    # del máximo)
+    def _evict(self, conn):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self.ttl:
+                conn.execute(
+                    "DELETE FROM entradas WHERE creado < ?", (time.time() - self.ttl,)
+                )
+            total = conn.execute(
+                "SELECT COALESCE(SUM(bytes), 0) FROM entradas"
+            ).fetchone()[0]
+            excess = total - EVICT_TO * self.max_bytes
+            if total <= self.max_bytes or excess <= 0:
+                return
+            victims = []
+            rows = conn.execute(
+                "SELECT clave, bytes FROM entradas ORDER BY usado"
+            ).fetchall()
+            for clave, size in rows:
+                victims.append((clave,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM entradas WHERE clave = ?", victims)
+        logger.info("Caché en disco: %s entradas expulsadas", len(victims))
+
+    def stats(self):
+        try:
+            with self.pool.connection() as conn:
+                entradas, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas"
+                ).fetchone()
+        except sqlite3.Error:
+            entradas, total = None, None
+        with self._lock:
+            return {
+                "entradas": entradas,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.hits,
+                "fallos": self.misses,
+                "errores": self.errors,
+            }
+
+    def clear(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM entradas")
+
+
+# Una instancia por proceso (None si está desactivada)
+DISK_CACHE = DiskCache(DISK_CACHE_PATH, DISK_CACHE_MB * 2**20) if DISK_CACHE_PATH else None
@@ -0,0 +1,48 @@
+import streamlit as st
+
+from core.cache import RESULTS
+
+# Filtros en cascada: (columna, etiqueta, clave del widget, valores excluidos)
+# La partición (libro de origen) solo aparece si la fuente la usa como filtro.
+FILTERS = [
+    ("PARTICION", "Partición", "particion", ()),
+    ("PAIS", "País", "pais", ()),
+    ("FINANCIAMIENTO", "Financiamiento", "financiamiento", ("SIN ESPECIFICAR",)),
+    ("TIPO", "Tipo", "tipo", ("SIN CLASIFICAR",)),
+    ("NIVEL", "Nivel", "nivel", ()),
+    ("FACULTAD ASOCIADA", "Facultad", "facultad", ()),
+]
+
+
+# Opciones de un filtro según lo seleccionado en los niveles anteriores, en
+# la caché de resultados: al cambiar un filtro solo se calculan de nuevo las
+# listas de los niveles siguientes (las anteriores no dependen de él)
+def filter_options(source, col, selecciones, exclude=()):
+    key = ("opciones", source.key(selecciones), col, tuple(exclude))
+    opciones = RESULTS.get_or_compute(
+        source.version,
+        key,
+        lambda: tuple(source.options(col, selecciones, exclude=exclude)),
+    )
+    return list(opciones)
+
+
+# Dibujar los filtros en cascada y devolver los valores seleccionados.
+# Las opciones de cada nivel las da la fuente de datos (cubo o SQL) según
+# lo seleccionado en los niveles anteriores.
+def render_filters(source):
+    filtros = [f for f in FILTERS if f[0] in source.filter_columns]
+    # Una columna por filtro
+    columns = st.columns(len(filtros))
+
+    selecciones = {}
+    for (col, label, key, excluded), container in zip(filtros, columns):
+        with container:
+            opciones = ["Todos"] + filter_options(source, col, selecciones, excluded)
+            seleccion = st.selectbox(label, opciones, key=key)
+
+        # Aplicar filtro para los niveles siguientes
+        if seleccion != "Todos":
+            selecciones[col] = seleccion
+
+    return selecciones
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from core.loader import FILTER_COLUMNS
+
+
+# Índice invertido por columna de filtro: valor -> ids de fila ordenados.
+# Se construye una vez por snapshot; seleccionar filas cuesta en proporción
+# a las filas que coinciden, no al tamaño de la tabla.
+# `arrays` (de arrays()) evita recalcular los ids ordenados: así el índice
+# puede apoyarse en arreglos mapeados desde disco (core.shared).
+class FilterIndex:
+    def __init__(self, df, columns=FILTER_COLUMNS, arrays=None):
+        self.num_rows = len(df)
+        row_dtype = np.int32 if self.num_rows < 2**31 else np.int64
+        self._codes = {}
+        self._categories = {}
+        self._lookup = {}
+        self._order = {}
+        self._bounds = {}
+        self._postings = {}
+        self._missing = {}
+        self._sorted_codes = {}
+        self._present = {}
+
+        for col in columns:
+            serie = df[col]
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                serie = serie.astype("category")
+            codes = serie.cat.codes.to_numpy()
+            categories = serie.cat.categories
+            num_categories = len(categories)
+
+            if arrays is None:
+                # Ids de fila agrupados por código (orden estable = orden original)
+                order = np.argsort(codes, kind="stable").astype(row_dtype)
+                counts = np.bincount(codes[codes >= 0], minlength=num_categories)
+                start = int((codes < 0).sum())
+                bounds = start + np.concatenate(([0], np.cumsum(counts)))
+            else:
+                order, bounds = arrays[col]
+                counts = np.diff(bounds)
+                start = int(bounds[0])
+
+            self._codes[col] = codes
+            self._categories[col] = categories
+            self._order[col] = order
+            self._bounds[col] = bounds
+            self._lookup[col] = {value: code for code, value in enumerate(categories)}
+            self._postings[col] = [
+                order[bounds[code] : bounds[code + 1]] for code in range(num_categories)
+            ]
+            self._missing[col] = order[:start]
+            # Orden de presentación de las opciones (mismo criterio que sort_filter_values)
+            self._sorted_codes[col] = np.array(
+                sorted(range(num_categories), key=lambda c: str(categories[c]).lower()),
+                dtype=np.intp,
+            )
+            self._present[col] = counts > 0
+
+            # Estructuras compartidas entre sesiones: solo lectura
+            for array in self._postings[col] + [
+                codes,
+                order,
+                bounds,
+                self._missing[col],
+                self._sorted_codes[col],
+                self._present[col],
+            ]:
+                array.flags.writeable = False
+
+    # Ids de fila ordenados por código y límites de cada código, por columna
+    def arrays(self):
+        return {col: (self._order[col], self._bounds[col]) for col in self._order}
+
+    # Ids de fila de un valor concreto
+    def rows(self, col, value):
+        code = self._lookup[col].get(value)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        return self._postings[col][code]
+
+    # Restringir un conjunto de filas (None = todas) a col == value
+    def refine(self, rows, col, value):
+        if rows is None:
+            return self.rows(col, value)
+        code = self._lookup[col].get(value)
+        if code is None:
+            return rows[:0]
+        return rows[self._codes[col][rows] == code]
+
+    # Filas que cumplen todas las selecciones; None significa "todas las filas"
+    def select(self, selections):
+        selections = {col: value for col, value in selections.items() if value is not None}
+        if not selections:
+            return None
+        # Empezar por la lista más corta y filtrar el resto por código
+        ordered = sorted(selections.items(), key=lambda item: len(self.rows(*item)))
+        rows = None
+        for col, value in ordered:
+            rows = self.refine(rows, col, value)
+            if len(rows) == 0:
+                break
+        return rows
+
+    # Filas con exactamente estos valores; aquí None significa "vacío"
+    def match(self, values):
+        postings = []
+        for col, value in values.items():
+            if value is None:
+                postings.append((col, -1, self._missing[col]))
+                continue
+            code = self._lookup[col].get(value)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            postings.append((col, code, self._postings[col][code]))
+
+        postings.sort(key=lambda posting: len(posting[2]))
+        rows = postings[0][2]
+        for col, code, _ in postings[1:]:
+            rows = rows[self._codes[col][rows] == code]
+            if len(rows) == 0:
+                break
+        return rows
+
+    # Para cada clave (tupla sobre `columns`, None = "Todos"): ¿hay alguna fila
+    # con col == value que la cumpla? Las combinaciones de `columns` presentes en
+    # esas filas se empaquetan en un int64 (un campo de bits por columna) y cada
+    # clave se compara, con su máscara, contra las combinaciones distintas.
+    def exists_many(self, columns, keys, col, value):
+        rows = self.rows(col, value)
+        found = np.zeros(len(keys), dtype=bool)
+        if len(rows) == 0 or not keys:
+            return found
+
+        widths = [int(len(self._categories[c]) + 1).bit_length() for c in columns]
+        shifts = np.cumsum([0] + widths[:-1]).tolist()
+        packed = np.zeros(len(rows), dtype=np.int64)
+        for c, shift in zip(columns, shifts):
+            packed |= (self._codes[c][rows].astype(np.int64) + 1) << shift
+        packed = np.unique(packed)
+
+        masks = np.zeros(len(keys), dtype=np.int64)
+        wanted = np.zeros(len(keys), dtype=np.int64)
+        valid = np.ones(len(keys), dtype=bool)
+        for i, key in enumerate(keys):
+            for c, v, width, shift in zip(columns, key, widths, shifts):
+                if v is None:
+                    continue
+                code = self._lookup[c].get(v)
+                if code is None:
+                    valid[i] = False
+                    break
+                masks[i] |= ((1 << width) - 1) << shift
+                wanted[i] |= (code + 1) << shift
+
+        found[valid] = (
+            (packed[None, :] & masks[valid, None]) == wanted[valid, None]
+        ).any(axis=1)
+        return found
+
+    # Valores disponibles de una columna dentro de un conjunto de filas
+    def options(self, col, rows=None, exclude=()):
+        if rows is None:
+            present = self._present[col]
+        else:
+            codes = self._codes[col][rows]
+            present = (
+                np.bincount(codes[codes >= 0], minlength=len(self._categories[col]))
+                > 0
+            )
+        sorted_codes = self._sorted_codes[col]
+        categories = self._categories[col]
+        return [
+            categories[code]
+            for code in sorted_codes[present[sorted_codes]]
+            if categories[code] not in exclude
+        ]
@@ -0,0 +1,520 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Rutas de datos: cada libro .xlsx de DATA_DIR es una partición del dataset
+# (p. ej. un período académico o un proveedor)
+DATA_DIR = "db"
+WORKBOOK_PATH = os.path.join(DATA_DIR, "base.xlsx")
+SNAPSHOT_DIR = os.path.join(DATA_DIR, ".snapshots")
+
+# Columna con el nombre del libro de origen (filtro extra si hay varios)
+PARTITION_COLUMN = "PARTICION"
+
+# Procesos para leer en paralelo los libros sin snapshot
+MAX_INGEST_WORKERS = (
+    len(os.sched_getaffinity(0))
+    if hasattr(os, "sched_getaffinity")
+    else os.cpu_count() or 1
+)
+
+# Incrementar cuando cambie el esquema o los tipos del snapshot
+SNAPSHOT_FORMAT = 2
+
+# Columnas usadas por los filtros en cascada
+FILTER_COLUMNS = ["PAIS", "FINANCIAMIENTO", "TIPO", "NIVEL", "FACULTAD ASOCIADA"]
+
+# Dimensiones que se guardan como categóricas (códigos enteros + diccionario)
+CATEGORY_COLUMNS = FILTER_COLUMNS + ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+
+# Filas que se acumulan antes de convertirlas a bloques tipados por columna
+INGEST_CHUNK_ROWS = 20_000
+
+# Tope de memoria residente del proceso durante la ingesta (MB, 0 = sin tope)
+INGEST_MAX_RSS_MB = int(os.environ.get("OFERTA_INGEST_MAX_RSS_MB", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+# Leer el libro de Excel fila a fila (openpyxl en modo solo lectura).
+# Cada bloque de filas se convierte a columnas tipadas (códigos enteros para
+# las dimensiones), así el libro nunca está completo en memoria como objetos.
+def read_workbook(file_path, chunk_rows=INGEST_CHUNK_ROWS):
+    # openpyxl solo hace falta al ingerir (no al servir desde snapshots)
+    import openpyxl
+
+    rss_inicial = rss_bytes()
+    rss_pico = rss_inicial
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        # Las filas vacías se omiten (igual que pd.read_excel)
+        rows = (row for row in rows if any(value is not None for value in row))
+        header = next(rows, None) or ()
+        # Limpiar nombres de columnas
+        names = [
+            f"Unnamed: {i}" if name is None else str(name).strip()
+            for i, name in enumerate(header)
+        ]
+        builders = [_ColumnBuilder(name) for name in names]
+        width = len(names)
+
+        chunk = []
+        num_rows = 0
+        for row in rows:
+            if len(row) != width:
+                row = (tuple(row) + (None,) * width)[:width]
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                num_rows += _flush_chunk(builders, chunk)
+                chunk = []
+                rss_pico = _check_rss(rss_pico, file_path)
+        if chunk:
+            num_rows += _flush_chunk(builders, chunk)
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame(
+        {builder.name: builder.finish() for builder in builders}, copy=False
+    )
+    antes = pd.Series({builder.name: builder.raw_bytes for builder in builders})
+    df, report = optimize_dtypes(df, antes=antes)
+    rss_pico = _check_rss(rss_pico, file_path)
+    logger.info(
+        "Ingesta de %s: %s filas, memoria %.1f MB -> %.1f MB (%.0f%% menos), "
+        "pico RSS %s",
+        file_path,
+        num_rows,
+        report["antes"] / 1e6,
+        report["despues"] / 1e6,
+        report["ahorro_pct"],
+        "n/d"
+        if rss_pico is None
+        else f"{rss_pico / 1e6:.1f} MB (+{(rss_pico - rss_inicial) / 1e6:.1f} MB)",
+    )
+    return df
+
+
+def _flush_chunk(builders, chunk):
+    for builder, values in zip(builders, zip(*chunk)):
+        builder.append(values)
+    return len(chunk)
+
+
+# Columna acumulada por bloques: códigos int32 + diccionario para las dimensiones
+# (las de filtros sin espacios sobrantes), float64 para MATRICULADOS y object
+# para el resto. `raw_bytes` estima lo que ocuparía la columna leída con los
+# tipos por defecto de pandas (texto y float/int), para el informe de ahorro.
+class _ColumnBuilder:
+    def __init__(self, name):
+        self.name = name
+        self.strip = name in FILTER_COLUMNS
+        self.categorical = name in CATEGORY_COLUMNS
+        self.numeric = name == "MATRICULADOS"
+        self.lookup = {}
+        self.chunks = []
+        self.raw_bytes = 0
+
+    def append(self, values):
+        if self.strip:
+            values = [None if v is None else str(v).strip() for v in values]
+        if self.categorical:
+            lookup = self.lookup
+            codes = np.fromiter(
+                (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values),
+                dtype=np.int32,
+                count=len(values),
+            )
+            self.chunks.append(codes)
+        elif self.numeric:
+            numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+            self.chunks.append(numbers.to_numpy(dtype=np.float64, na_value=np.nan))
+        else:
+            self.chunks.append(np.array(values, dtype=object))
+
+    def finish(self):
+        if not self.chunks:
+            return pd.Series([], dtype=object)
+        values = np.concatenate(self.chunks)
+        self.chunks = []
+        if self.categorical:
+            # Cada fila ocuparía lo de su valor; los vacíos, lo de None
+            sizes = _row_bytes(list(self.lookup) + [None])
+            codes = np.where(values < 0, len(self.lookup), values)
+            counts = np.bincount(codes, minlength=len(self.lookup) + 1)
+            self.raw_bytes = int(counts @ sizes)
+            return _categorical(values, list(self.lookup))
+
+        serie = pd.Series(values)
+        self.raw_bytes = int(serie.memory_usage(index=False, deep=True))
+        # Columnas de texto con tipos mezclados no se pueden escribir en Parquet
+        if serie.dtype == object and pd.api.types.infer_dtype(
+            serie, skipna=True
+        ).startswith("mixed"):
+            serie = serie.astype("string")
+        return serie
+
+
+# Bytes por fila de cada valor en una columna de texto con el tipo que infiere
+# pandas (lo que mide memory_usage(deep=True)): puntero + objeto en object;
+# desplazamiento + UTF-8 en el texto de Arrow (pandas 3); el ancho del tipo
+# si son números
+def _row_bytes(values):
+    dtype = pd.Series(values).dtype
+    if dtype == object:
+        return np.array([8 + sys.getsizeof(v) for v in values], dtype=np.int64)
+    if isinstance(dtype, np.dtype):
+        return np.full(len(values), dtype.itemsize, dtype=np.int64)
+    return np.array(
+        [8 + (0 if v is None else len(str(v).encode())) for v in values],
+        dtype=np.int64,
+    )
+
+
+# Categórica con el diccionario ordenado (mismo orden que astype("category"))
+def _categorical(codes, values):
+    categories = pd.Index(values, dtype=object)
+    if pd.api.types.infer_dtype(categories, skipna=True).startswith("mixed"):
+        # Tipos mezclados: se guardan como texto, unificando duplicados ("1" y 1)
+        remap, categories = pd.factorize(categories.map(str))
+        codes = np.where(codes >= 0, remap[codes], -1)
+        categories = pd.Index(categories, dtype=object)
+    order = categories.argsort()
+    position = np.empty(len(order), dtype=np.int32)
+    position[order] = np.arange(len(order), dtype=np.int32)
+    codes = np.where(codes >= 0, position[codes], -1).astype(np.int32)
+    return pd.Categorical.from_codes(codes, categories=categories[order])
+
+
+# Memoria residente actual del proceso (None si no se puede medir)
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# Actualizar el pico de memoria y cortar la ingesta si supera el tope
+def _check_rss(rss_pico, file_path):
+    rss = rss_bytes()
+    if rss is None:
+        return rss_pico
+    rss_pico = max(rss_pico or 0, rss)
+    if INGEST_MAX_RSS_MB and rss_pico > INGEST_MAX_RSS_MB * 1e6:
+        raise MemoryError(
+            f"La ingesta de {file_path} superó el tope de memoria "
+            f"({rss_pico / 1e6:.0f} MB > {INGEST_MAX_RSS_MB} MB)"
+        )
+    return rss_pico
+
+
+# Convertir dimensiones a categóricas y reducir MATRICULADOS al entero más pequeño.
+# `antes` (bytes por columna) reemplaza la medición inicial si las columnas ya
+# llegan tipadas (ingesta por bloques).
+def optimize_dtypes(df, antes=None):
+    if antes is None:
+        antes = df.memory_usage(index=False, deep=True)
+    df = df.copy()
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            # Diccionario ordenado: los códigos respetan el orden alfabético
+            df[col] = df[col].astype("category")
+
+    if "MATRICULADOS" in df.columns:
+        matriculados = pd.to_numeric(df["MATRICULADOS"], errors="coerce")
+        if matriculados.notna().all() and (matriculados % 1 == 0).all():
+            df["MATRICULADOS"] = pd.to_numeric(
+                matriculados.astype("int64"), downcast="integer"
+            )
+        else:
+            df["MATRICULADOS"] = matriculados
+
+    despues = df.memory_usage(index=False, deep=True)
+    report = {
+        "antes": int(antes.sum()),
+        "despues": int(despues.sum()),
+        "ahorro_pct": (
+            100.0 * (1 - despues.sum() / antes.sum()) if antes.sum() else 0.0
+        ),
+        "columnas": {
+            col: {"antes": int(antes[col]), "despues": int(despues[col])}
+            for col in df.columns
+        },
+    }
+    return df, report
+
+
+# Hash del contenido del archivo (identifica el snapshot)
+def content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _snapshot_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _manifest_path(file_path):
+    return os.path.join(SNAPSHOT_DIR, _snapshot_name(file_path) + ".json")
+
+
+def _snapshot_path(file_path, digest):
+    return os.path.join(
+        SNAPSHOT_DIR,
+        f"{_snapshot_name(file_path)}-{digest[:16]}-v{SNAPSHOT_FORMAT}.parquet",
+    )
+
+
+def _read_manifest(file_path):
+    try:
+        with open(_manifest_path(file_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Escribir `path` con `write(ruta_temporal)` y reemplazarlo de una vez: los
+# lectores nunca ven un archivo a medio escribir
+def write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Versión del archivo: el hash solo se recalcula si cambian mtime o tamaño
+def workbook_version(file_path=WORKBOOK_PATH):
+    stat = os.stat(file_path)
+    manifest = _read_manifest(file_path)
+    if (
+        manifest is not None
+        and manifest.get("mtime_ns") == stat.st_mtime_ns
+        and manifest.get("size") == stat.st_size
+    ):
+        return manifest["sha256"]
+    return content_hash(file_path)
+
+
+# Candado entre procesos (fcntl) sobre `lock_path`; sin fcntl (Windows) no
+# bloquea
+@contextmanager
+def file_lock(lock_path):
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Asegurar el snapshot columnar del libro (se reconstruye si el libro cambió).
+# Devuelve la ruta del snapshot y el hash del libro.
+def build_snapshot(file_path=WORKBOOK_PATH):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    stat = os.stat(file_path)
+    digest = workbook_version(file_path)
+    snapshot_path = _snapshot_path(file_path, digest)
+
+    if not os.path.exists(snapshot_path):
+        # Un solo proceso construye cada snapshot: los demás esperan el
+        # candado y reutilizan el archivo que quedó escrito
+        lock_path = os.path.join(SNAPSHOT_DIR, _snapshot_name(file_path) + ".lock")
+        with file_lock(lock_path):
+            if not os.path.exists(snapshot_path):
+                df = read_workbook(file_path)
+                write_atomic(snapshot_path, lambda p: df.to_parquet(p, index=False))
+
+                # Eliminar snapshots anteriores del mismo libro
+                pattern = re.compile(
+                    re.escape(_snapshot_name(file_path)) + r"-[0-9a-f]{16}-v\d+\.parquet"
+                )
+                for name in os.listdir(SNAPSHOT_DIR):
+                    path = os.path.join(SNAPSHOT_DIR, name)
+                    if pattern.fullmatch(name) and path != snapshot_path:
+                        os.remove(path)
+
+    manifest = {
+        "sha256": digest,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "snapshot": os.path.basename(snapshot_path),
+    }
+    write_atomic(
+        _manifest_path(file_path),
+        lambda p: _write_json(p, manifest),
+    )
+    return snapshot_path, digest
+
+
+# Cargar el snapshot columnar de un libro
+def load_snapshot(file_path=WORKBOOK_PATH):
+    snapshot_path, digest = build_snapshot(file_path)
+
+    # Leer siempre desde el snapshot: mismos tipos en carga fría y caliente
+    df = pd.read_parquet(snapshot_path)
+
+    # Versión del snapshot para las estructuras derivadas (índices, agregados)
+    df.attrs["version"] = digest
+    return df
+
+
+# Libros del dataset particionado (se ignoran los temporales de Excel "~$")
+def list_partitions(data_dir=DATA_DIR):
+    return [
+        os.path.join(data_dir, name)
+        for name in sorted(os.listdir(data_dir))
+        if name.endswith(".xlsx") and not name.startswith("~$")
+    ]
+
+
+def _has_snapshot(file_path):
+    return os.path.exists(_snapshot_path(file_path, workbook_version(file_path)))
+
+
+# Cargar todas las particiones y unirlas en una sola tabla. Los libros sin
+# snapshot se leen en paralelo (un proceso por libro, hasta MAX_INGEST_WORKERS);
+# cada partición conserva su propio snapshot y solo se relee si cambió.
+def load_dataset(data_dir=DATA_DIR):
+    paths = list_partitions(data_dir)
+    if not paths:
+        raise FileNotFoundError(f"No hay libros .xlsx en '{data_dir}'")
+
+    pending = [path for path in paths if not _has_snapshot(path)]
+    if len(pending) > 1 and MAX_INGEST_WORKERS > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(len(pending), MAX_INGEST_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            list(pool.map(build_snapshot, pending))
+
+    frames = [load_snapshot(path) for path in paths]
+    names = [_snapshot_name(path) for path in paths]
+    df = _concat_partitions(frames, names)
+
+    df.attrs["version"] = _combine_versions(
+        names, [frame.attrs["version"] for frame in frames]
+    )
+    return df
+
+
+# Versión del dataset: el hash del libro, o el de la lista de particiones
+def _combine_versions(names, digests):
+    if len(digests) == 1:
+        return digests[0]
+    digest = hashlib.sha256()
+    for name, version in zip(names, digests):
+        digest.update(f"{name}:{version}\n".encode())
+    return digest.hexdigest()
+
+
+# Versión actual de los libros de `data_dir` sin cargarlos (None si no hay).
+# Usa los manifiestos de los snapshots; solo hashea los libros nuevos.
+def dataset_version(data_dir=DATA_DIR):
+    if not os.path.isdir(data_dir):
+        return None
+    paths = list_partitions(data_dir)
+    if not paths:
+        return None
+    return _combine_versions(
+        [_snapshot_name(path) for path in paths],
+        [workbook_version(path) for path in paths],
+    )
+
+
+# Unir particiones: las dimensiones se unen con un diccionario común ordenado
+# y se agrega la columna de partición (categórica, un código por libro)
+def _concat_partitions(frames, names):
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    data = {}
+    for col in columns:
+        present = [frame[col] for frame in frames if col in frame.columns]
+        if any(isinstance(part.dtype, pd.CategoricalDtype) for part in present):
+            # Libros sin la columna: categórica vacía del mismo tipo
+            empty = pd.CategoricalDtype(present[0].astype("category").cat.categories[:0])
+            parts = [
+                frame[col].astype("category").array
+                if col in frame.columns
+                else pd.Categorical.from_codes(np.full(len(frame), -1), dtype=empty)
+                for frame in frames
+            ]
+            data[col] = union_categoricals(parts, sort_categories=True)
+        else:
+            parts = [
+                frame[col] if col in frame.columns else pd.Series(np.nan, index=frame.index)
+                for frame in frames
+            ]
+            data[col] = pd.concat(parts, ignore_index=True)
+
+    codes = np.repeat(
+        np.arange(len(frames), dtype=np.int8 if len(frames) < 128 else np.int32),
+        [len(frame) for frame in frames],
+    )
+    data[PARTITION_COLUMN] = pd.Categorical.from_codes(codes, categories=names)
+    return pd.DataFrame(data, copy=False)
+
+
+# Columnas de filtro del dataset: la partición solo cuando hay más de un libro
+def dataset_filter_columns(df):
+    if PARTITION_COLUMN in df.columns and len(df[PARTITION_COLUMN].cat.categories) > 1:
+        return [PARTITION_COLUMN] + FILTER_COLUMNS
+    return list(FILTER_COLUMNS)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+# Marcar como solo lectura los buffers de un DataFrame sin copiarlos
+def freeze_frame(df):
+    columns = {}
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codes = serie.array.codes
+            codes.flags.writeable = False
+            values = pd.Categorical.from_codes(codes, dtype=serie.dtype)
+        elif isinstance(serie.dtype, np.dtype):
+            values = serie.to_numpy()
+            values.flags.writeable = False
+        else:
+            values = serie.array
+        columns[col] = values
+
+    frozen = pd.DataFrame(columns, index=df.index, copy=False)
+    frozen.attrs = dict(df.attrs)
+    return frozen
+
+
+# Nombre, mtime y tamaño de cada libro de `data_dir` (firma sin leerlos)
+def partition_stats(data_dir=DATA_DIR):
+    stats = []
+    for path in list_partitions(data_dir):
+        stat = os.stat(path)
+        stats.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
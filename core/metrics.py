@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.accesslog import ACCESS_LOG
+from core.cache import RESULTS
+from core.diskcache import DISK_CACHE
+
+# Tiempos por etapa de cada ejecución de página (carga, filtros, agregación,
+# figuras, serialización de tablas y gráficos) con p50/p95 móviles.
+#   OFERTA_PERF_PANEL=1     muestra el panel de rendimiento en la barra lateral
+#                           (también con ?debug=1 en la URL)
+#   OFERTA_METRICS_FILE     archivo de métricas en texto plano (formato
+#                           Prometheus) que se reescribe en cada ejecución
+# El panel y el archivo también muestran aciertos y fallos de la caché de
+# resultados (core.cache) y de la caché en disco (core.diskcache).
+PANEL_ENV = "OFERTA_PERF_PANEL"
+METRICS_FILE_ENV = "OFERTA_METRICS_FILE"
+
+# Muestras que se conservan por (página, etapa)
+WINDOW_SIZE = 500
+
+# Campos de stats() de las cachés -> (métrica de Prometheus, tipo, ayuda)
+CACHE_METRICS = {
+    "aciertos": ("hits_total", "counter", "Lecturas encontradas en la caché"),
+    "fallos": ("misses_total", "counter", "Lecturas no encontradas en la caché"),
+    "aciertos_l2": (
+        "l2_hits_total",
+        "counter",
+        "Fallos de la caché resueltos por su segundo nivel",
+    ),
+    "expulsiones": ("evictions_total", "counter", "Entradas expulsadas o vencidas"),
+    "errores": ("errors_total", "counter", "Errores de lectura o escritura"),
+    "entradas": ("entries", "gauge", "Entradas en la caché"),
+    "max_entradas": ("max_entries", "gauge", "Máximo de entradas"),
+    "bytes": ("bytes", "gauge", "Bytes de los valores guardados"),
+    "max_bytes": ("max_bytes", "gauge", "Máximo de bytes"),
+}
+
+logger = logging.getLogger(__name__)
+
+
+# Ventanas móviles de tiempos, compartidas por todas las sesiones del proceso
+class StageStats:
+    def __init__(self, window=WINDOW_SIZE):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, page, timings):
+        with self._lock:
+            for stage, seconds in timings.items():
+                samples = self._samples.get((page, stage))
+                if samples is None:
+                    samples = self._samples[(page, stage)] = deque(maxlen=self.window)
+                samples.append(seconds)
+
+    # {(página, etapa): (p50, p95, muestras)}
+    def quantiles(self, page=None):
+        with self._lock:
+            items = [
+                (key, np.array(samples))
+                for key, samples in self._samples.items()
+                if page is None or key[0] == page
+            ]
+        return {
+            key: (
+                float(np.percentile(samples, 50)),
+                float(np.percentile(samples, 95)),
+                len(samples),
+            )
+            for key, samples in items
+        }
+
+    # Métricas en formato de texto de Prometheus
+    def metrics_text(self):
+        lines = [
+            "# HELP oferta_stage_seconds Tiempo por etapa de cada ejecución de página",
+            "# TYPE oferta_stage_seconds summary",
+        ]
+        for (page, stage), (p50, p95, count) in sorted(self.quantiles().items()):
+            labels = f'page="{page}",stage="{stage}"'
+            lines.append(f'oferta_stage_seconds{{{labels},quantile="0.5"}} {p50:.6f}')
+            lines.append(f'oferta_stage_seconds{{{labels},quantile="0.95"}} {p95:.6f}')
+            lines.append(f"oferta_stage_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+STATS = StageStats()
+
+
+# Estadísticas de las cachés del proceso: {nombre: stats()}
+def cache_stats(results=RESULTS, disk_cache=DISK_CACHE):
+    caches = {"resultados": results.stats()}
+    if disk_cache is not None:
+        caches["disco"] = disk_cache.stats()
+    return caches
+
+
+# Estadísticas de las cachés en formato de texto de Prometheus (una familia
+# por campo, con la caché como etiqueta)
+def cache_metrics_text(caches):
+    lines = []
+    for field, (name, kind, help_text) in CACHE_METRICS.items():
+        samples = [
+            (cache, stats[field])
+            for cache, stats in caches.items()
+            if stats.get(field) is not None
+        ]
+        if not samples:
+            continue
+        lines.append(f"# HELP oferta_cache_{name} {help_text}")
+        lines.append(f"# TYPE oferta_cache_{name} {kind}")
+        for cache, value in samples:
+            lines.append(f'oferta_cache_{name}{{cache="{cache}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+# Cronómetro de una ejecución de página: cada mark() asigna el tiempo desde
+# la marca anterior a la etapa indicada (las etapas repetidas se suman).
+# Con log_selections() la ejecución también queda en el registro de accesos.
+class PageTimer:
+    def __init__(self, page, stats=STATS, access_log=ACCESS_LOG, panel=True):
+        self.page = page
+        self.stats = stats
+        self.access_log = access_log
+        self.panel = panel
+        self.selections = None
+        self.timings = {}
+        self.finished = False
+        self._start = self._last = time.perf_counter()
+
+    # Selección de filtros de esta ejecución (para el registro de accesos)
+    def log_selections(self, selections):
+        self.selections = dict(selections)
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    # Tiempos de una sección de la página que es un fragmento (st.fragment).
+    # En la ejecución completa se suman a esta página; si el fragmento se
+    # vuelve a ejecutar solo (la página ya terminó) van a una ejecución propia
+    # "<página>/<sección>", sin registro de accesos ni panel (un fragmento no
+    # puede dibujar en la barra lateral).
+    @contextmanager
+    def section(self, name):
+        if not self.finished:
+            yield self
+            return
+        timer = PageTimer(
+            f"{self.page}/{name}", self.stats, access_log=None, panel=False
+        )
+        yield timer
+        timer.finish()
+
+    # Cerrar la ejecución: registrar, emitir la línea de log y mostrar el panel
+    def finish(self):
+        self.finished = True
+        self.timings["total"] = time.perf_counter() - self._start
+        self.stats.add(self.page, self.timings)
+        if self.access_log is not None and self.selections is not None:
+            self.access_log.record(self.page, self.selections, self.timings["total"])
+
+        quantiles = self.stats.quantiles(self.page)
+        p50, p95, _ = quantiles[(self.page, "total")]
+        etapas = " ".join(
+            f"{stage}_ms={seconds * 1e3:.1f}" for stage, seconds in self.timings.items()
+        )
+        logger.info(
+            "perf page=%s %s total_p50_ms=%.1f total_p95_ms=%.1f",
+            self.page.replace(" ", "_"),
+            etapas,
+            p50 * 1e3,
+            p95 * 1e3,
+        )
+
+        path = os.environ.get(METRICS_FILE_ENV)
+        panel = self.panel and _panel_enabled()
+        caches = cache_stats() if path or panel else None
+        if path:
+            _write_metrics(path, self.stats.metrics_text() + cache_metrics_text(caches))
+
+        if panel:
+            self.render_panel(quantiles, caches)
+
+    def render_panel(self, quantiles, caches):
+        tabla = pd.DataFrame(
+            [
+                {
+                    "Etapa": stage,
+                    "Esta ejecución (ms)": round(seconds * 1e3, 1),
+                    "p50 (ms)": round(quantiles[(self.page, stage)][0] * 1e3, 1),
+                    "p95 (ms)": round(quantiles[(self.page, stage)][1] * 1e3, 1),
+                    "Muestras": quantiles[(self.page, stage)][2],
+                }
+                for stage, seconds in self.timings.items()
+            ]
+        )
+        tabla_caches = pd.DataFrame(
+            [
+                {
+                    "Caché": cache,
+                    "Aciertos": stats["aciertos"],
+                    "Fallos": stats["fallos"],
+                    "Tasa (%)": round(100 * _hit_rate(stats), 1),
+                    "Entradas": stats["entradas"],
+                }
+                for cache, stats in caches.items()
+            ]
+        )
+        with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+            st.dataframe(tabla, hide_index=True, use_container_width=True)
+            st.dataframe(tabla_caches, hide_index=True, use_container_width=True)
+
+
+def _hit_rate(stats):
+    lecturas = stats["aciertos"] + stats["fallos"]
+    return stats["aciertos"] / lecturas if lecturas else 0.0
+
+
+def _panel_enabled():
+    if os.environ.get(PANEL_ENV) == "1":
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+
+def _write_metrics(path, text):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("No se pudo escribir %s: %s", path, e)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from core.aggregations import top_k, truncate_label
+from core.cache import cached_query
+
+# Número de elementos en cada ranking
+RANKING_SIZE = 10
+
+# Tabla de detalle del Dashboard: órdenes disponibles (columna, ascendente)
+# y tamaños de página
+DETAIL_SORTS = {
+    "Matriculados (mayor a menor)": ("MATRICULADOS", False),
+    "Matriculados (menor a mayor)": ("MATRICULADOS", True),
+    "Carrera (A-Z)": ("CARRERA", True),
+    "Carrera (Z-A)": ("CARRERA", False),
+}
+DETAIL_PAGE_SIZES = [25, 50, 100]
+
+# Colores por nivel en el gráfico de burbujas
+NIVEL_COLORS = {
+    "PREGRADO": "#3b82f6",  # Azul
+    "POSGRADO": "#ef4444",  # Rojo
+}
+
+
+# Dashboard: tarjetas y detalle de carreras
+@cached_query
+def dashboard_results(source, selecciones):
+    totales = source.totals(selecciones)
+
+    # Agrupar por carrera y sumar matriculados
+    df_tabla = source.sum_by("NOMBRE CARRERA", selecciones)
+    df_tabla = df_tabla.rename(columns={"NOMBRE CARRERA": "CARRERA"})
+
+    # Ordenar de mayor a menor por matriculados
+    df_tabla = df_tabla.sort_values("MATRICULADOS", ascending=False)
+    return totales, df_tabla
+
+
+# Filas de la tabla de detalle que coinciden con `texto` (en CARRERA, sin
+# distinguir mayúsculas), en el orden pedido. La página visible se toma de aquí.
+def detail_rows(df_tabla, texto="", orden="Matriculados (mayor a menor)"):
+    df = df_tabla
+    texto = texto.strip()
+    if texto:
+        carreras = df["CARRERA"]
+        if isinstance(carreras.dtype, pd.CategoricalDtype):
+            # Buscar en el diccionario y filtrar por códigos
+            categorias = carreras.cat.categories.astype(str)
+            coinciden = np.flatnonzero(
+                categorias.str.contains(texto, case=False, regex=False)
+            )
+            mask = np.isin(carreras.cat.codes.to_numpy(), coinciden)
+        else:
+            mask = carreras.astype(str).str.contains(texto, case=False, regex=False)
+        df = df[mask]
+
+    columna, ascendente = DETAIL_SORTS[orden]
+    # dashboard_results ya entrega la tabla de mayor a menor
+    if (columna, ascendente) != ("MATRICULADOS", False):
+        key = (lambda s: s.astype(str).str.lower()) if columna == "CARRERA" else None
+        df = df.sort_values(columna, ascending=ascendente, kind="stable", key=key)
+    return df
+
+
+# Ranking: top de carreras y de universidades
+@cached_query
+def ranking_results(source, selecciones):
+    totales = source.totals(selecciones)
+
+    # Agrupar por carrera y quedarse con el top (nombres truncados a 50)
+    df_grafico = source.top_candidates("NOMBRE CARRERA", selecciones, RANKING_SIZE)
+    df_grafico = df_grafico.rename(columns={"NOMBRE CARRERA": "CARRERA"})
+    df_grafico = top_k(df_grafico, "CARRERA", k=RANKING_SIZE, max_len=50)
+
+    # Lo mismo por universidad
+    df_uni = source.top_candidates("NOMBRE INSTITUCION", selecciones, RANKING_SIZE)
+    df_uni = df_uni.rename(columns={"NOMBRE INSTITUCION": "INSTITUCION"})
+    df_uni_top = top_k(df_uni, "INSTITUCION", k=RANKING_SIZE, max_len=50)
+    return totales, df_grafico, df_uni_top
+
+
+# Instituciones: métricas por carrera para el gráfico de burbujas
+@cached_query
+def bubble_results(source, selecciones):
+    df_bubble = source.career_metrics(selecciones)
+
+    # Truncar nombres de carreras para mejor visualización
+    df_bubble["CARRERA_TRUNCADA"] = df_bubble["CARRERA"].apply(
+        lambda x: truncate_label(x, 40)
+    )
+
+    # Gris por defecto para niveles sin color asignado
+    df_bubble["COLOR"] = df_bubble["NIVEL"].map(NIVEL_COLORS).fillna("#9ca3af")
+    return df_bubble
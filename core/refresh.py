@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+
+from core.artifact import artifact_cube, artifact_path
+from core.cube import build_cube
+from core.loader import DATA_DIR, freeze_frame, load_dataset, partition_stats
+from core.shared import SHARED_MEMORY, shared_cube
+from core.warmup import schedule_warmup
+
+# Fuente local (artefacto o libros de DATA_DIR) con revalidación en segundo
+# plano: mientras se construye una versión nueva, las sesiones siguen
+# recibiendo la anterior, y el cambio es una sola asignación.
+#   OFERTA_REFRESH_INTERVAL   segundos entre revisiones del hilo vigilante
+#                             (0 = sin vigilante; solo se revisa al llegar
+#                             peticiones)
+REFRESH_INTERVAL = float(os.environ.get("OFERTA_REFRESH_INTERVAL", "30"))
+
+# Mínimo de segundos entre revisiones disparadas por peticiones
+CHECK_INTERVAL = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+# Firma barata de los datos: nombre, mtime y tamaño de cada libro y del artefacto
+def data_signature(data_dir=DATA_DIR):
+    try:
+        stat = os.stat(artifact_path())
+        artifact = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        artifact = None
+    partitions = partition_stats(data_dir) if os.path.isdir(data_dir) else ()
+    return partitions, artifact
+
+
+# Construir la fuente local: el artefacto si está al día, si no los libros
+# (arreglos compartidos entre procesos con OFERTA_SHARED_MEMORY=1; si no,
+# snapshot + cubo, incremental respecto del anterior si se puede)
+def load_local_source(data_dir=DATA_DIR):
+    cube = artifact_cube()
+    if cube is not None:
+        return cube
+    if SHARED_MEMORY:
+        return shared_cube(data_dir)
+    df = freeze_frame(load_dataset(data_dir))
+    return build_cube(df.attrs["version"], df)
+
+
+class Refresher:
+    def __init__(self, load=load_local_source, signature=data_signature, interval=None):
+        self._load = load
+        self._signature = signature
+        self.interval = REFRESH_INTERVAL if interval is None else interval
+        # Una sola construcción a la vez en el proceso (entre procesos, el
+        # candado de build_snapshot)
+        self._building = threading.Lock()
+        self._source = None
+        self._source_signature = None
+        self._checked = 0.0
+        self._watcher = None
+        self._listeners = []
+        self.last_error = None
+
+    # Fuente vigente. Solo la primera petición espera la construcción (no hay
+    # otra versión que servir); después, si los datos cambiaron, la versión
+    # nueva se construye en segundo plano y se publica al terminar.
+    def current(self):
+        if self._source is None:
+            with self._building:
+                if self._source is None:
+                    signature = self._signature()
+                    self._publish(signature, self._load())
+                    self._start_watcher()
+            return self._source
+
+        now = time.monotonic()
+        if now - self._checked >= CHECK_INTERVAL:
+            self._checked = now
+            self.revalidate(background=True)
+        return self._source
+
+    # Reconstruir si la firma cambió y no hay otra construcción en curso.
+    # Devuelve True si se inició una construcción.
+    def revalidate(self, background=True):
+        signature = self._signature()
+        if signature == self._source_signature:
+            return False
+        if not self._building.acquire(blocking=False):
+            return False
+        if background:
+            threading.Thread(
+                target=self._rebuild, args=(signature,), name="oferta-refresh", daemon=True
+            ).start()
+        else:
+            self._rebuild(signature)
+        return True
+
+    # Llamar a `callback(source)` cada vez que se publica una versión
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def _rebuild(self, signature):
+        start = time.perf_counter()
+        try:
+            source = self._load()
+        except Exception as e:
+            # Se sigue sirviendo la versión anterior; se reintenta cuando la
+            # firma vuelva a cambiar (p. ej. al terminar de copiarse el libro)
+            self.last_error = e
+            self._source_signature = signature
+            logger.exception("No se pudo actualizar la fuente de datos")
+        else:
+            self._publish(signature, source)
+            logger.info(
+                "Fuente de datos actualizada a %s en %.1f s",
+                source.version,
+                time.perf_counter() - start,
+            )
+        finally:
+            self._building.release()
+
+    def _publish(self, signature, source):
+        self._source = source
+        self._source_signature = signature
+        self.last_error = None
+        for callback in list(self._listeners):
+            try:
+                callback(source)
+            except Exception:
+                logger.exception("Error al notificar la nueva versión")
+
+    def _start_watcher(self):
+        if self.interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, name="oferta-refresh-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.revalidate(background=False)
+            except Exception:
+                logger.exception("Error al revisar la fuente de datos")
+
+
+# Una instancia por proceso, compartida por todas las sesiones. Cada versión
+# publicada (al arrancar y tras cada actualización) se precalienta con las
+# combinaciones más visitadas (core.warmup).
+REFRESHER = Refresher()
+REFRESHER.subscribe(schedule_warmup)
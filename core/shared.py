@@ -0,0 +1,316 @@
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from core.cube import APPROXIMATE_DISTINCT, SKETCH_PRECISION, Cube
+from core.index import FilterIndex
+from core.loader import (
+    DATA_DIR,
+    dataset_filter_columns,
+    dataset_version,
+    file_lock,
+    load_dataset,
+)
+from core.sketch import DistinctSketches
+
+# Celdas del cubo, índices y totales de una versión de los datos como
+# arreglos .npy en un directorio por versión. Cada proceso los abre con
+# np.load(mmap_mode="r"): son páginas de solo lectura del mismo archivo,
+# así la caché de páginas del sistema guarda una sola copia física para todos
+# los workers de la máquina. El primer proceso que necesita una versión la
+# escribe (bajo candado); los demás solo la mapean.
+#   OFERTA_SHARED_MEMORY=1   servir los libros desde los arreglos mapeados
+# No aplica al artefacto (sus totales ya se leen de SQLite bajo demanda) ni a
+# la fuente SQL.
+SHARED_ENV = "OFERTA_SHARED_MEMORY"
+SHARED_MEMORY = os.environ.get(SHARED_ENV) == "1"
+SHARED_DIR = os.path.join(DATA_DIR, ".shared")
+
+# Incrementar cuando cambie el formato de los arreglos
+SHARED_FORMAT = 1
+
+TOTAL_COLUMNS = ["MATRICULADOS", "INSTITUCIONES", "CARRERAS", "REGISTROS"]
+
+logger = logging.getLogger(__name__)
+
+
+# Directorio de una versión (el modo aproximado guarda sketches en vez de
+# conteos distintos exactos)
+def shared_path(version, approximate=None):
+    approximate = APPROXIMATE_DISTINCT if approximate is None else approximate
+    suffix = f"-hll{SKETCH_PRECISION}" if approximate else ""
+    return os.path.join(SHARED_DIR, f"{version[:16]}-v{SHARED_FORMAT}{suffix}")
+
+
+# Totales de todas las combinaciones de filtros en arreglos: cada clave se
+# empaqueta en un int64 (código + 1 por columna en su campo de bits, 0 =
+# "Todos") y se busca por bisección en las claves ordenadas. Para el cubo
+# hace de diccionario de totales.
+class TotalsTable:
+    def __init__(self, categories, keys, values):
+        self._lookup = [
+            {value: code + 1 for code, value in enumerate(column)} for column in categories
+        ]
+        widths = [int(len(column)).bit_length() for column in categories]
+        if sum(widths) > 63:
+            raise ValueError("Demasiadas categorías para empaquetar las claves de totales")
+        self._shifts = np.cumsum([0] + widths[:-1]).tolist()
+        self.keys = keys
+        self.values = values
+
+    # Tabla a partir de los pares (clave, totales) del cubo
+    @classmethod
+    def from_totals(cls, categories, totals, matriculados_dtype):
+        table = cls(categories, np.empty(0, dtype=np.int64), {})
+        keys = np.fromiter(
+            (table._pack(key) for key, _ in totals), dtype=np.int64, count=len(totals)
+        )
+        order = np.argsort(keys)
+        table.keys = keys[order]
+        for name in TOTAL_COLUMNS:
+            dtype = matriculados_dtype if name == "MATRICULADOS" else np.int64
+            # Conteos sin calcular (modo aproximado) como -1
+            column = np.fromiter(
+                (-1 if value[name] is None else value[name] for _, value in totals),
+                dtype=dtype,
+                count=len(totals),
+            )
+            table.values[name] = column[order]
+        return table
+
+    def _pack(self, key):
+        packed = 0
+        for lookup, shift, value in zip(self._lookup, self._shifts, key):
+            if value is None:
+                continue
+            code = lookup.get(value)
+            if code is None:
+                return None
+            packed |= code << shift
+        return packed
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Totales de la combinación `key` (interfaz de dict.get)
+    def get(self, key, default=None):
+        packed = self._pack(key)
+        if packed is None:
+            return default
+        position = int(np.searchsorted(self.keys, packed))
+        if position == len(self.keys) or self.keys[position] != packed:
+            return default
+        totals = {name: self.values[name][position].item() for name in TOTAL_COLUMNS}
+        for name in ["INSTITUCIONES", "CARRERAS"]:
+            if totals[name] < 0:
+                totals[name] = None
+        return totals
+
+
+# Arreglos y descripción (json) de una columna categórica
+def _categorical_parts(serie):
+    categories = serie.cat.categories
+    spec = {"categorias": categories.tolist(), "dtype": str(categories.dtype)}
+    return serie.cat.codes.to_numpy(), spec
+
+
+def _categorical_column(codes, spec):
+    dtype = pd.CategoricalDtype(pd.Index(spec["categorias"], dtype=spec["dtype"]))
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
+# Escribir los arreglos del cubo en `path` (directorio nuevo; se escribe en
+# uno temporal y se renombra al terminar)
+def write_shared(cube, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path)
+    files = {}
+
+    def save(name, array):
+        files[name] = f"{len(files):03d}.npy"
+        np.save(os.path.join(tmp_path, files[name]), np.ascontiguousarray(array))
+
+    try:
+        # Celdas del cubo e índice de filtros
+        celdas = {}
+        for col in cube.dimensions:
+            codes, celdas[col] = _categorical_parts(cube.cells[col])
+            save(f"celdas/{col}", codes)
+        for col in ["MATRICULADOS", "REGISTROS"]:
+            save(f"celdas/{col}", cube.cells[col].to_numpy())
+        for col, (order, bounds) in cube.index.arrays().items():
+            save(f"indice/{col}/orden", order)
+            save(f"indice/{col}/limites", bounds)
+
+        # Totales de todas las combinaciones de filtros
+        totals = TotalsTable.from_totals(
+            [cube.cells[col].cat.categories for col in cube.filter_columns],
+            cube.totals_items(),
+            cube.cells["MATRICULADOS"].dtype,
+        )
+        save("totales/claves", totals.keys)
+        for name, values in totals.values.items():
+            save(f"totales/{name}", values)
+
+        # Modo aproximado: celdas de filtros, su índice y los sketches
+        if cube.approximate:
+            for col in cube.filter_columns:
+                save(f"filtros/{col}", cube.filter_cells[col].cat.codes.to_numpy())
+            for col, (order, bounds) in cube.filter_index.arrays().items():
+                save(f"indice_filtros/{col}/orden", order)
+                save(f"indice_filtros/{col}/limites", bounds)
+            for name, sketches in cube.sketches.items():
+                save(f"sketches/{name}/offsets", sketches.offsets)
+                save(f"sketches/{name}/registros", sketches.registers)
+                save(f"sketches/{name}/rangos", sketches.ranks)
+
+        meta = {
+            "formato": SHARED_FORMAT,
+            "version": cube.version,
+            "filtros": cube.filter_columns,
+            "aproximado": cube.approximate,
+            "precision": SKETCH_PRECISION,
+            "celdas": celdas,
+            "archivos": files,
+            "creado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.rename(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+# Descripción y arreglos mapeados (solo lectura) de un directorio
+def _open_shared(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("formato") != SHARED_FORMAT:
+        raise ValueError(
+            f"Formato de arreglos compartidos {meta.get('formato')} "
+            f"(se esperaba {SHARED_FORMAT})"
+        )
+    # Vistas ndarray de los memmap: las porciones (listas de ids por valor)
+    # pesan menos que subclases memmap y siguen apoyadas en el mismo mapeo
+    arrays = {
+        name: np.asarray(np.load(os.path.join(path, file), mmap_mode="r"))
+        for name, file in meta["archivos"].items()
+    }
+    return meta, arrays
+
+
+# Cubo sobre los arreglos mapeados: celdas, índices, totales y sketches no se
+# copian; por proceso solo quedan los diccionarios valor -> código
+def map_cube(path):
+    meta, arrays = _open_shared(path)
+    filter_columns = meta["filtros"]
+    dimensions = filter_columns + ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+
+    cells = {
+        col: _categorical_column(arrays[f"celdas/{col}"], meta["celdas"][col])
+        for col in dimensions
+    }
+    cells["MATRICULADOS"] = arrays["celdas/MATRICULADOS"]
+    cells["REGISTROS"] = arrays["celdas/REGISTROS"]
+    cells = pd.DataFrame(cells, copy=False)
+    index = FilterIndex(cells, dimensions, arrays=_index_arrays(arrays, "indice", dimensions))
+
+    totals = TotalsTable(
+        [cells[col].cat.categories for col in filter_columns],
+        arrays["totales/claves"],
+        {name: arrays[f"totales/{name}"] for name in TOTAL_COLUMNS},
+    )
+
+    sketches = None
+    if meta["aproximado"]:
+        filter_cells = pd.DataFrame(
+            {
+                col: pd.Categorical.from_codes(
+                    arrays[f"filtros/{col}"], dtype=cells[col].dtype
+                )
+                for col in filter_columns
+            },
+            copy=False,
+        )
+        filter_index = FilterIndex(
+            filter_cells,
+            filter_columns,
+            arrays=_index_arrays(arrays, "indice_filtros", filter_columns),
+        )
+        sketches = (
+            filter_cells,
+            filter_index,
+            {
+                name: DistinctSketches.from_arrays(
+                    arrays[f"sketches/{name}/offsets"],
+                    arrays[f"sketches/{name}/registros"],
+                    arrays[f"sketches/{name}/rangos"],
+                    meta["precision"],
+                )
+                for name in ["INSTITUCIONES", "CARRERAS"]
+            },
+        )
+
+    df = pd.DataFrame()
+    df.attrs["version"] = meta["version"]
+    return Cube(
+        df,
+        filter_columns,
+        cells=cells,
+        totals=totals,
+        approximate=meta["aproximado"],
+        index=index,
+        sketches=sketches,
+    )
+
+
+def _index_arrays(arrays, prefix, columns):
+    return {
+        col: (arrays[f"{prefix}/{col}/orden"], arrays[f"{prefix}/{col}/limites"])
+        for col in columns
+    }
+
+
+# Directorio de la versión actual de los libros de `data_dir`; si no existe,
+# lo construye un solo proceso (los demás esperan el candado y lo reutilizan)
+def ensure_shared(data_dir=DATA_DIR):
+    version = dataset_version(data_dir)
+    if version is None:
+        raise FileNotFoundError(f"No hay libros .xlsx en '{data_dir}'")
+    path = shared_path(version)
+    if os.path.isdir(path):
+        return path
+
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    with file_lock(os.path.join(SHARED_DIR, "build.lock")):
+        if os.path.isdir(path):
+            return path
+        df = load_dataset(data_dir)
+        path = shared_path(df.attrs["version"])
+        if not os.path.isdir(path):
+            write_shared(Cube(df, dataset_filter_columns(df)), path)
+            logger.info("Arreglos compartidos de la versión %s en %s", df.attrs["version"], path)
+        _remove_stale(path)
+    return path
+
+
+# Eliminar versiones anteriores (los procesos que aún las mapean conservan
+# sus páginas hasta soltarlas)
+def _remove_stale(current):
+    pattern = re.compile(r"[0-9a-f]{16}-v\d+(-hll\d+)?")
+    prefix = os.path.basename(current)[:16]
+    for name in os.listdir(SHARED_DIR):
+        if pattern.fullmatch(name) and not name.startswith(prefix):
+            shutil.rmtree(os.path.join(SHARED_DIR, name), ignore_errors=True)
+
+
+# Cubo de los libros de `data_dir` desde los arreglos compartidos
+def shared_cube(data_dir=DATA_DIR):
+    return map_cube(ensure_shared(data_dir))
+
@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Conteo aproximado de valores distintos con HyperLogLog. Cada grupo (celda
+# de filtros del cubo) guarda su sketch en forma dispersa: pares (registro,
+# rango) con el máximo por registro. Los sketches se combinan tomando el
+# máximo por registro, así el conteo de cualquier combinación de filtros sale
+# de unir los sketches de sus celdas, sin volver a recorrer filas.
+#
+# Con precisión p hay 2^p registros y el error relativo típico es 1.04/√(2^p)
+# (p=14: ±0.81 %).
+DEFAULT_PRECISION = 14
+
+
+# Hash de 64 bits por valor (estable entre procesos); None para vacíos
+def hash_values(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categories = serie.cat.categories.to_numpy(dtype=object)
+        hashes = pd.util.hash_array(categories, categorize=False)
+        codes = serie.cat.codes.to_numpy()
+        valid = codes >= 0
+        return valid, hashes[np.where(valid, codes, 0)]
+    values = serie.to_numpy(dtype=object)
+    valid = ~pd.isna(values)
+    return valid, pd.util.hash_array(np.where(valid, values, ""), categorize=True)
+
+
+# Número de bits significativos de enteros sin signo de 32 bits
+def _bit_length32(values):
+    result = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    result[positive] = np.floor(np.log2(values[positive].astype(np.float64))) + 1
+    return result
+
+
+# Registro (p bits altos) y rango (ceros a la izquierda del resto + 1)
+def _register_rank(hashes, precision):
+    hashes = hashes.astype(np.uint64)
+    registers = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes << np.uint64(precision)
+    high = (rest >> np.uint64(32)).astype(np.uint32)
+    low = (rest & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    bits = np.where(high > 0, _bit_length32(high) + 32, _bit_length32(low))
+    ranks = np.minimum(64 - bits + 1, 64 - precision + 1)
+    return registers, ranks.astype(np.uint8)
+
+
+# Estimación de HyperLogLog sobre registros densos (corrección para rangos
+# pequeños por conteo lineal)
+def estimate(registers):
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int64)).sum()
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros > 0:
+        return m * math.log(m / zeros)
+    return raw
+
+
+# Sketches dispersos de `values` (hashes de 64 bits) por grupo
+class DistinctSketches:
+    def __init__(self, groups, valid, hashes, num_groups, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.error = 1.04 / math.sqrt(self.num_registers)
+
+        groups = np.asarray(groups, dtype=np.int64)[valid]
+        registers, ranks = _register_rank(np.asarray(hashes)[valid], precision)
+
+        # Un par por (grupo, registro) con el rango máximo
+        order = np.lexsort((-ranks.astype(np.int64), registers, groups))
+        groups, registers, ranks = groups[order], registers[order], ranks[order]
+        first = np.ones(len(groups), dtype=bool)
+        first[1:] = (groups[1:] != groups[:-1]) | (registers[1:] != registers[:-1])
+        groups, registers, ranks = groups[first], registers[first], ranks[first]
+
+        self.offsets = np.searchsorted(groups, np.arange(num_groups + 1))
+        self.registers = registers.astype(np.uint32 if precision > 16 else np.uint16)
+        self.ranks = ranks
+        for array in [self.offsets, self.registers, self.ranks]:
+            array.flags.writeable = False
+
+    # Sketches a partir de sus arreglos (offsets, registros, rangos) ya
+    # calculados, p. ej. mapeados desde disco
+    @classmethod
+    def from_arrays(cls, offsets, registers, ranks, precision=DEFAULT_PRECISION):
+        sketches = cls.__new__(cls)
+        sketches.precision = precision
+        sketches.num_registers = 1 << precision
+        sketches.error = 1.04 / math.sqrt(sketches.num_registers)
+        sketches.offsets, sketches.registers, sketches.ranks = offsets, registers, ranks
+        return sketches
+
+    # Registros densos de la unión de los grupos indicados (None = todos)
+    def merge(self, groups=None):
+        dense = np.zeros(self.num_registers, dtype=np.uint8)
+        if groups is None:
+            registers, ranks = self.registers, self.ranks
+        else:
+            groups = np.asarray(groups, dtype=np.int64)
+            starts, ends = self.offsets[groups], self.offsets[groups + 1]
+            lengths = ends - starts
+            # Posiciones de los pares de cada grupo, concatenadas
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            positions += np.arange(int(lengths.sum()))
+            registers, ranks = self.registers[positions], self.ranks[positions]
+        np.maximum.at(dense, registers, ranks)
+        return dense
+
+    # Valores distintos (aproximado) en la unión de los grupos
+    def count(self, groups=None):
+        return int(round(estimate(self.merge(groups))))
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from core.loader import FILTER_COLUMNS
+
+# Origen de datos configurable:
+#   OFERTA_SQL_CONNECTION  cadena de conexión ODBC (SQL Server vía pyodbc)
+#   OFERTA_SQL_TABLE       tabla normalizada con las columnas de base.xlsx
+#   OFERTA_SQL_VERSION_QUERY  consulta que devuelve un marcador de cambios de
+#                          la tabla, p. ej. SELECT MAX(modificado) FROM oferta
+#                          o SELECT CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM oferta
+#                          (por defecto, hash de las sumas por celda del cubo)
+# Sin OFERTA_SQL_CONNECTION se usa el artefacto precalculado (core.artifact)
+# o, si no existe o está desactualizado, db/base.xlsx y el cubo en memoria
+# (mapeado desde disco y compartido entre procesos con OFERTA_SHARED_MEMORY=1,
+# core.shared); los cambios se detectan y cargan en segundo plano (core.refresh).
+#
+# Toda fuente de datos ofrece la misma interfaz que Cube:
+#   version, key(sel), options(col, sel, exclude), totals(sel),
+#   sum_by(col, sel), top_candidates(col, sel, k), career_metrics(sel)
+SQL_CONNECTION_ENV = "OFERTA_SQL_CONNECTION"
+SQL_TABLE_ENV = "OFERTA_SQL_TABLE"
+SQL_VERSION_QUERY_ENV = "OFERTA_SQL_VERSION_QUERY"
+DEFAULT_SQL_TABLE = "oferta"
+SQL_POOL_SIZE = 4
+SQL_SOURCE_TTL = 10 * 60
+
+
+def _quote(name):
+    return ".".join('"' + part.replace('"', '""') + '"' for part in name.split("."))
+
+
+# Pool de conexiones DB-API (se crean bajo demanda hasta `size`)
+class ConnectionPool:
+    def __init__(self, connect, size=SQL_POOL_SIZE):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                # Conexión en estado dudoso: no se devuelve al pool
+                conn.close()
+                raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# Fuente SQL: filtros y GROUP BY se ejecutan en la base de datos con
+# parámetros (estilo qmark, común a pyodbc y sqlite3)
+class SqlSource:
+    def __init__(
+        self,
+        connect,
+        table=DEFAULT_SQL_TABLE,
+        pool_size=SQL_POOL_SIZE,
+        version_query=None,
+    ):
+        self.filter_columns = list(FILTER_COLUMNS)
+        self.table = _quote(table)
+        self.pool = ConnectionPool(connect, pool_size)
+        self.version = f"sql:{table}:{self._data_version(version_query)}"
+
+    # Versión de los datos: hash del marcador de `version_query` o, sin él,
+    # de la suma de MATRICULADOS y el número de filas por celda del cubo
+    # (filtros, carrera e institución). Cambia con cualquier valor que usan
+    # las páginas, aunque se mantengan el número de filas y el total.
+    def _data_version(self, version_query):
+        if version_query:
+            rows = self._fetch(version_query)
+        else:
+            columns = ", ".join(
+                _quote(col)
+                for col in self.filter_columns + ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]
+            )
+            rows = self._fetch(
+                f'SELECT {columns}, SUM("MATRICULADOS"), COUNT(*) FROM {self.table} '
+                f"GROUP BY {columns} ORDER BY {columns}"
+            )
+        digest = hashlib.sha256()
+        for row in rows:
+            digest.update(repr(tuple(row)).encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _fetch(self, sql, params=()):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, list(params))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def _where(self, selections, extra=()):
+        conditions = list(extra)
+        params = []
+        for col in self.filter_columns:
+            value = selections.get(col)
+            if value is not None:
+                conditions.append(f"{_quote(col)} = ?")
+                params.append(value)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def key(self, selections):
+        return tuple(selections.get(col) for col in self.filter_columns)
+
+    def options(self, column, selections, exclude=()):
+        where, params = self._where(
+            selections, extra=[f"{_quote(column)} IS NOT NULL"]
+        )
+        rows = self._fetch(
+            f"SELECT DISTINCT {_quote(column)} FROM {self.table}{where}", params
+        )
+        values = [row[0] for row in rows if row[0] not in exclude]
+        return sorted(values, key=lambda v: str(v).lower())
+
+    def totals(self, selections):
+        where, params = self._where(selections)
+        matriculados, instituciones, carreras, registros = self._fetch(
+            'SELECT SUM("MATRICULADOS"), COUNT(DISTINCT "NOMBRE INSTITUCION"), '
+            f'COUNT(DISTINCT "NOMBRE CARRERA"), COUNT(*) FROM {self.table}{where}',
+            params,
+        )[0]
+        return {
+            "MATRICULADOS": matriculados or 0,
+            "INSTITUCIONES": int(instituciones),
+            "CARRERAS": int(carreras),
+            "REGISTROS": int(registros),
+        }
+
+    def sum_by(self, column, selections):
+        where, params = self._where(
+            selections, extra=[f"{_quote(column)} IS NOT NULL"]
+        )
+        rows = self._fetch(
+            f'SELECT {_quote(column)}, SUM("MATRICULADOS") FROM {self.table}'
+            f"{where} GROUP BY {_quote(column)}",
+            params,
+        )
+        df = pd.DataFrame.from_records(rows, columns=[column, "MATRICULADOS"])
+        df[column] = df[column].astype(object)
+        df["MATRICULADOS"] = df["MATRICULADOS"].fillna(0).astype("int64")
+        # Mismo orden que el cubo (orden de las categorías)
+        return df.sort_values(column, kind="stable", ignore_index=True)
+
+    def top_candidates(self, column, selections, k):
+        return self.sum_by(column, selections)
+
+    def career_metrics(self, selections):
+        where, params = self._where(selections, extra=['"NOMBRE CARRERA" IS NOT NULL'])
+        metrics = pd.DataFrame.from_records(
+            self._fetch(
+                'SELECT "NOMBRE CARRERA", COUNT(DISTINCT "NOMBRE INSTITUCION"), '
+                'SUM("MATRICULADOS"), COUNT(DISTINCT "PAIS") '
+                f'FROM {self.table}{where} GROUP BY "NOMBRE CARRERA"',
+                params,
+            ),
+            columns=["CARRERA", "NUM_INSTITUCIONES", "TOTAL_MATRICULADOS", "NUM_PAISES"],
+        )
+
+        # Nivel modal: registros por (carrera, nivel); empate -> primer nivel
+        niveles = pd.DataFrame.from_records(
+            self._fetch(
+                f'SELECT "NOMBRE CARRERA", "NIVEL", COUNT(*) FROM {self.table}'
+                f'{where} AND "NIVEL" IS NOT NULL GROUP BY "NOMBRE CARRERA", "NIVEL"',
+                params,
+            ),
+            columns=["CARRERA", "NIVEL", "REGISTROS"],
+        )
+        niveles = (
+            niveles.sort_values(
+                ["CARRERA", "REGISTROS", "NIVEL"],
+                ascending=[True, False, True],
+                kind="stable",
+            )
+            .drop_duplicates("CARRERA")
+            .set_index("CARRERA")["NIVEL"]
+        )
+
+        metrics = metrics.sort_values("CARRERA", kind="stable", ignore_index=True)
+        metrics["CARRERA"] = metrics["CARRERA"].astype(object)
+        for col in ["NUM_INSTITUCIONES", "TOTAL_MATRICULADOS", "NUM_PAISES"]:
+            metrics[col] = metrics[col].fillna(0).astype("int64")
+        metrics["NIVEL"] = pd.Series(
+            niveles.reindex(metrics["CARRERA"]).to_numpy(), dtype=object
+        )
+        return metrics
+
+
+# La versión se recalcula al expirar el recurso (SQL_SOURCE_TTL)
+@st.cache_resource(show_spinner=False, ttl=SQL_SOURCE_TTL)
+def _sql_source(connection_string, table, version_query):
+    import pyodbc
+
+    return SqlSource(
+        lambda: pyodbc.connect(connection_string), table, version_query=version_query
+    )
+
+
+# Fuente de datos activa para las páginas (None si no se pudo cargar)
+def get_source():
+    connection_string = os.environ.get(SQL_CONNECTION_ENV)
+    if connection_string:
+        try:
+            table = os.environ.get(SQL_TABLE_ENV, DEFAULT_SQL_TABLE)
+            version_query = os.environ.get(SQL_VERSION_QUERY_ENV)
+            return _sql_source(connection_string, table, version_query)
+        except Exception as e:
+            st.error(f"Error al conectar con la base de datos: {str(e)}")
+            return None
+
+    # Artefacto precalculado (python -m core.artifact) si está al día, o los
+    # libros; las versiones nuevas se construyen en segundo plano
+    from core.refresh import REFRESHER
+
+    try:
+        return REFRESHER.current()
+    except Exception as e:
+        st.error(f"Error al cargar el archivo: {str(e)}")
+        return None
@@ -0,0 +1,146 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.accesslog import ACCESS_LOG
+from core.cache import RESULTS
+from core.loader import DATA_DIR, rss_bytes
+from core.queries import bubble_results, dashboard_results, ranking_results
+
+# Precalentamiento de la caché de resultados con las combinaciones de filtros
+# más visitadas según el registro de accesos (core.accesslog). Corre en
+# segundo plano cada vez que se publica una versión de la fuente local (al
+# arrancar y tras cada actualización), con tope de tiempo y de memoria.
+#   OFERTA_WARM_TOP       combinaciones (página, filtros) a precalcular
+#                         (0 = sin precalentamiento)
+#   OFERTA_WARM_SECONDS   tope de tiempo de una pasada
+#   OFERTA_WARM_MB        tope de crecimiento de la memoria residente
+#   OFERTA_WARM_WORKERS   hilos del pool
+# Antes de abrir el tráfico también se puede llenar la caché en disco, que
+# comparten todas las réplicas de la máquina:
+#
+#   python -m core.warmup --data-dir db
+WARM_TOP = int(os.environ.get("OFERTA_WARM_TOP", "50"))
+WARM_SECONDS = float(os.environ.get("OFERTA_WARM_SECONDS", "30"))
+WARM_MB = float(os.environ.get("OFERTA_WARM_MB", "256"))
+WARM_WORKERS = int(os.environ.get("OFERTA_WARM_WORKERS", "2"))
+
+# Consulta en caché de cada página (nombre de su PageTimer)
+PAGE_QUERIES = {
+    "Dashboard": dashboard_results,
+    "Ranking": ranking_results,
+    "Instituciones": bubble_results,
+}
+
+logger = logging.getLogger(__name__)
+
+
+# Precalcular `entries` ([(página, selecciones, ...)], de la más visitada a
+# la menos) hasta agotar el tiempo o la memoria, o hasta que `is_current()`
+# indique que la fuente ya no es la vigente. Devuelve cuántas se calcularon.
+def warm(
+    source,
+    entries,
+    seconds=WARM_SECONDS,
+    max_mb=WARM_MB,
+    workers=WARM_WORKERS,
+    is_current=lambda: True,
+):
+    deadline = time.monotonic() + seconds
+    rss_inicial = rss_bytes()
+    stop = threading.Event()
+
+    def run(entry):
+        page, selections = entry[:2]
+        if stop.is_set():
+            return False
+        rss = rss_bytes()
+        if (
+            time.monotonic() > deadline
+            or not is_current()
+            or (max_mb and rss_inicial and rss and rss - rss_inicial > max_mb * 1e6)
+        ):
+            stop.set()
+            return False
+        try:
+            PAGE_QUERIES[page](source, selections)
+        except Exception:
+            logger.exception("Precalentamiento: falló %s %s", page, selections)
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="oferta-warm") as pool:
+        return sum(pool.map(run, entries))
+
+
+# Combinaciones a precalentar: las más visitadas de las páginas conocidas,
+# sin pasar de la capacidad de la caché (no se expulsan entre sí)
+def hot_entries(n=WARM_TOP, access_log=ACCESS_LOG):
+    if access_log is None or n <= 0:
+        return []
+    return access_log.top(min(n, RESULTS.max_entries), pages=list(PAGE_QUERIES))
+
+
+# Versión publicada más reciente: una pasada se detiene si llega otra
+_latest = {}
+
+
+# Lanzar una pasada en segundo plano para `source` (p. ej. al publicarse)
+def schedule_warmup(source):
+    if WARM_TOP <= 0 or ACCESS_LOG is None:
+        return
+    _latest["version"] = source.version
+
+    def target():
+        start = time.perf_counter()
+        entries = hot_entries()
+        done = warm(
+            source, entries, is_current=lambda: _latest.get("version") == source.version
+        )
+        if entries:
+            logger.info(
+                "Precalentamiento de %s: %s de %s combinaciones en %.1f s",
+                str(source.version)[:12],
+                done,
+                len(entries),
+                time.perf_counter() - start,
+            )
+
+    threading.Thread(target=target, name="oferta-warmup", daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precalcula las combinaciones más visitadas en la caché en disco"
+    )
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--top", type=int, default=WARM_TOP)
+    parser.add_argument("--seconds", type=float, default=WARM_SECONDS)
+    parser.add_argument("--max-mb", type=float, default=WARM_MB)
+    args = parser.parse_args(argv)
+
+    # Streamlit avisa que no hay contexto de ejecución al usar las cachés
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    if RESULTS.l2 is None:
+        print("Caché en disco desactivada (OFERTA_DISK_CACHE): nada que precalentar")
+        return 1
+
+    from core.refresh import load_local_source
+
+    start = time.perf_counter()
+    source = load_local_source(args.data_dir)
+    entries = hot_entries(args.top)
+    done = warm(source, entries, seconds=args.seconds, max_mb=args.max_mb)
+    print(
+        f"{done} de {len(entries)} combinaciones en la caché en disco "
+        f"en {time.perf_counter() - start:.1f} s (versión {source.version[:12]})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from benchmarks.generate import write_workbook
+from core.cube import Cube
+from core.loader import dataset_filter_columns, freeze_frame, load_dataset
+
+# Dos libros sintéticos (benchmarks.generate) en db/ de un directorio de
+# trabajo, compartidos por todos los tests de la sesión
+
+ROWS = 3_000
+
+
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("oferta")
+    os.makedirs(path / "db")
+    write_workbook(str(path / "db" / "2022.xlsx"), ROWS, seed=1)
+    write_workbook(str(path / "db" / "2023.xlsx"), ROWS, seed=2)
+    return path
+
+
+@pytest.fixture(scope="session")
+def dataset(workdir):
+    previous_dir = os.getcwd()
+    # Los snapshots se escriben en db/.snapshots del directorio actual
+    os.chdir(workdir)
+    try:
+        return freeze_frame(load_dataset("db"))
+    finally:
+        os.chdir(previous_dir)
+
+
+@pytest.fixture(scope="session")
+def cube(dataset):
+    return Cube(dataset, dataset_filter_columns(dataset), approximate=False)
@@ -0,0 +1,30 @@
+import random
+
+import numpy as np
+
+# Utilidades comunes de los tests (los fixtures están en conftest.py)
+
+NUM_SELECTIONS = 100
+
+
+# Selecciones de filtros al azar tomadas de filas de `df` (la primera es
+# "Todos" en todos los filtros)
+def random_selections(df, filter_columns, count=NUM_SELECTIONS, seed=0):
+    rng = random.Random(seed)
+    result = [{}]
+    for _ in range(count - 1):
+        row = df.iloc[rng.randrange(len(df))]
+        result.append({col: row[col] for col in filter_columns if rng.random() < 0.5})
+    return result
+
+
+# Tabla con texto en lugar de categóricas, como la leían las páginas
+def decoded(df):
+    return df.astype({col: object for col in df.select_dtypes("category").columns})
+
+
+def filtered(df, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in selections.items():
+        mask &= (df[col] == value).to_numpy()
+    return df[mask]
@@ -0,0 +1,63 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import core.cube
+from core.aggregations import top_k
+from core.artifact import ARTIFACT_FORMAT, build_artifact, load_artifact
+from core.queries import RANKING_SIZE
+from tests.helpers import random_selections
+
+# El cubo servido desde el artefacto (core.artifact) frente al cubo exacto
+# construido desde la tabla.
+
+
+@pytest.fixture(scope="module")
+def artifact(dataset, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("artefacto") / "oferta.sqlite")
+    # El modo aproximado no debe llegar al artefacto, que no guarda sketches
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(core.cube, "APPROXIMATE_DISTINCT", True)
+        build_artifact(dataset, path)
+        return path
+
+
+def test_artifact_round_trip(artifact, cube):
+    loaded = load_artifact(artifact)
+    assert loaded.version == cube.version
+    assert not loaded.approximate
+    pd.testing.assert_frame_equal(loaded.cells, cube.cells)
+
+    for selections in random_selections(cube.cells, cube.filter_columns):
+        assert loaded.totals(selections) == cube.totals(selections)
+        for column in ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]:
+            expected = top_k(cube.sum_by(column, selections), column, k=RANKING_SIZE)
+            candidates = loaded.top_candidates(column, selections, RANKING_SIZE)
+            result = top_k(candidates, column, k=RANKING_SIZE)
+            pd.testing.assert_frame_equal(result, expected)
+
+
+def test_artifact_records_exact_mode(artifact):
+    conn = sqlite3.connect(artifact)
+    try:
+        rows = conn.execute("SELECT clave, valor FROM meta")
+        meta = {name: json.loads(value) for name, value in rows}
+    finally:
+        conn.close()
+    assert meta["formato"] == ARTIFACT_FORMAT
+    assert meta["aproximado"] is False
+
+
+# Un artefacto marcado como aproximado (o de un formato anterior) no se carga
+@pytest.mark.parametrize("clave, valor", [("aproximado", True), ("formato", 1)])
+def test_artifact_rejects_other_modes(artifact, tmp_path, clave, valor):
+    path = tmp_path / "oferta.sqlite"
+    path.write_bytes(open(artifact, "rb").read())
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE meta SET valor = ? WHERE clave = ?", (json.dumps(valor), clave))
+    conn.close()
+    with pytest.raises(ValueError):
+        load_artifact(str(path))
@@ -0,0 +1,84 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import core.cache
+from core.cache import ResultCache
+
+# La caché de resultados (core.cache) con dos versiones del snapshot
+# conviviendo, como durante una recarga.
+
+
+def test_versions_do_not_clear_each_other():
+    cache = ResultCache()
+    cache.put("v1", "a", 1)
+    cache.put("v2", "a", 2)
+    # Una petición atrasada con la versión anterior no vacía la nueva
+    assert cache.get("v1", "a") == (True, 1)
+    cache.put("v1", "b", 3)
+    assert cache.get("v2", "a") == (True, 2)
+    assert cache.get("v2", "b") == (False, None)
+    assert cache.stats()["versiones"] == 2
+
+
+def test_rebase_keeps_valid_entries():
+    cache = ResultCache()
+    for key in ["a", "b", "c"]:
+        cache.put("v1", key, key.upper())
+    cache.rebase("v1", "v2", keep=lambda key: key != "b")
+
+    assert cache.get("v2", "a") == (True, "A")
+    assert cache.get("v2", "b") == (False, None)
+    assert cache.get("v2", "c") == (True, "C")
+    # La versión anterior se sigue sirviendo mientras alguien la use
+    assert cache.get("v1", "b") == (True, "B")
+
+    # Un precalentamiento tardío de v1 no borra lo conservado en v2
+    cache.put("v1", "d", "D")
+    assert cache.get("v2", "a") == (True, "A")
+
+
+def test_rebase_from_unknown_version_is_noop():
+    cache = ResultCache()
+    cache.put("v2", "a", 1)
+    cache.rebase("v0", "v3", keep=lambda key: True)
+    assert cache.get("v2", "a") == (True, 1)
+    assert cache.stats()["entradas"] == 1
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = ResultCache(max_entries=2, ttl=10)
+    cache.put("v1", "a", 1)
+    cache.put("v1", "b", 2)
+    assert cache.get("v1", "a")[0]
+    cache.put("v1", "c", 3)
+    # "b" era la menos usada
+    assert cache.get("v1", "b") == (False, None)
+    assert cache.get("v1", "a")[0]
+
+    later = time.monotonic() + 11
+    monkeypatch.setattr(core.cache, "time", SimpleNamespace(monotonic=lambda: later))
+    assert cache.get("v1", "a") == (False, None)
+    assert cache.stats()["expulsiones"] == 2
+
+
+@pytest.mark.parametrize("found", [True, False])
+def test_get_or_compute_uses_l2(found):
+    class L2:
+        def __init__(self):
+            self.puts = []
+
+        def get(self, version, key):
+            return (True, "l2") if found else (False, None)
+
+        def put(self, version, key, value):
+            self.puts.append((version, key, value))
+
+    l2 = L2()
+    cache = ResultCache(l2=l2)
+    value = cache.get_or_compute("v1", "a", lambda: "calculado")
+    assert value == ("l2" if found else "calculado")
+    assert cache.get("v1", "a") == (True, value)
+    assert l2.puts == ([] if found else [("v1", "a", "calculado")])
+    assert cache.stats()["aciertos_l2"] == int(found)
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+import pytest
+
+import core.diskcache
+from core.diskcache import DiskCache
+
+# La caché en disco (core.diskcache): expulsión por tamaño, vencimiento,
+# valores ilegibles y claves de otra huella de código o configuración.
+
+VALUE_BYTES = 10_000
+
+
+# Bytes aleatorios: zlib no los comprime y cada entrada ocupa lo mismo
+def _value():
+    return os.urandom(VALUE_BYTES)
+
+
+def _rows(cache):
+    conn = sqlite3.connect(cache.path)
+    try:
+        return conn.execute("SELECT COUNT(*), SUM(bytes) FROM entradas").fetchone()
+    finally:
+        conn.close()
+
+
+def _execute(cache, sql, params=()):
+    conn = sqlite3.connect(cache.path)
+    try:
+        with conn:
+            conn.execute(sql, params)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "cache.sqlite"), 20 * VALUE_BYTES)
+
+
+def test_round_trip_and_counters(cache):
+    assert cache.get("v1", ("totales", ())) == (False, None)
+    cache.put("v1", ("totales", ()), {"MATRICULADOS": 10})
+    assert cache.get("v1", ("totales", ())) == (True, {"MATRICULADOS": 10})
+    # Otra versión de datos es otra clave
+    assert cache.get("v2", ("totales", ())) == (False, None)
+    stats = cache.stats()
+    assert (stats["aciertos"], stats["fallos"], stats["errores"]) == (1, 2, 0)
+    assert stats["entradas"] == 1
+
+
+def test_eviction_keeps_recently_used(cache, monkeypatch):
+    monkeypatch.setattr(core.diskcache, "TOUCH_INTERVAL", 0)
+    for i in range(15):
+        cache.put("v1", i, _value())
+    # La entrada 0 se vuelve a usar: las expulsadas son las siguientes
+    assert cache.get("v1", 0)[0]
+    for i in range(15, 25):
+        cache.put("v1", i, _value())
+
+    entradas, total = _rows(cache)
+    assert total <= cache.max_bytes
+    assert entradas < 25
+    assert cache.get("v1", 0)[0]
+    assert not cache.get("v1", 1)[0]
+    assert cache.get("v1", 24)[0]
+
+
+def test_expired_entries_are_misses(cache):
+    cache.put("v1", "a", 1)
+    cache.put("v1", "b", 2)
+    _execute(
+        cache,
+        "UPDATE entradas SET creado = creado - ? WHERE clave LIKE ?",
+        (cache.ttl + 1, '%"a"]'),
+    )
+    assert cache.get("v1", "a") == (False, None)
+    assert cache.get("v1", "b") == (True, 2)
+    assert _rows(cache)[0] == 1
+
+    # Sin vencimiento (ttl = 0) las entradas se conservan
+    cache.ttl = 0
+    _execute(cache, "UPDATE entradas SET creado = 0")
+    assert cache.get("v1", "b") == (True, 2)
+
+
+def test_corrupt_row_is_an_error(cache):
+    cache.put("v1", "a", {"x": 1})
+    _execute(cache, "UPDATE entradas SET valor = ?", (b"no es zlib",))
+    assert cache.get("v1", "a") == (False, None)
+    assert cache.stats()["errores"] == 1
+    # La entrada se puede volver a escribir
+    cache.put("v1", "a", {"x": 1})
+    assert cache.get("v1", "a") == (True, {"x": 1})
+
+
+def test_namespace_invalidation(cache, monkeypatch):
+    cache.put("v1", "a", 1)
+    # Otra configuración OFERTA_* cambia la huella: no lee las entradas
+    monkeypatch.setenv("OFERTA_TEST_NAMESPACE", "1")
+    other = DiskCache(cache.path, cache.max_bytes)
+    assert other.namespace != cache.namespace
+    assert other.get("v1", "a") == (False, None)
+    assert cache.get("v1", "a") == (True, 1)
+
+
+def test_format_change_clears_entries(cache, monkeypatch):
+    cache.put("v1", "a", 1)
+    monkeypatch.setattr(core.diskcache, "DISK_CACHE_FORMAT", 0)
+    other = DiskCache(cache.path, cache.max_bytes)
+    assert other.get("v1", "a") == (False, None)
+    assert _rows(other)[0] == 0
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.aggregations import career_metrics, top_k
+from core.cube import Cube
+from core.delta import diff_tables
+from core.loader import PARTITION_COLUMN, freeze_frame, optimize_dtypes
+from tests.helpers import decoded, filtered, random_selections
+
+# Los kernels vectorizados (career_metrics, top_k), el cubo y su recarga
+# incremental comparados con los groupby de pandas que usaban las páginas
+# originalmente, sobre los libros sintéticos de conftest.py.
+
+
+# Métricas del bubble chart como las calculaba 3_Instituciones.py
+def _baseline_bubble(rows):
+    df = (
+        rows.groupby("NOMBRE CARRERA")
+        .agg(
+            {
+                "NOMBRE INSTITUCION": "nunique",
+                "MATRICULADOS": "sum",
+                "PAIS": "nunique",
+                "NIVEL": lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
+            }
+        )
+        .reset_index()
+    )
+    df.columns = [
+        "CARRERA",
+        "NUM_INSTITUCIONES",
+        "TOTAL_MATRICULADOS",
+        "NUM_PAISES",
+        "NIVEL",
+    ]
+    return df
+
+
+def _assert_bubble_equal(result, expected):
+    result = result.astype({"CARRERA": object, "NIVEL": object})
+    expected = expected.astype({"CARRERA": object, "NIVEL": object})
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_career_metrics_matches_groupby(dataset, cube):
+    text = decoded(dataset)
+    for selections in random_selections(text, cube.filter_columns):
+        expected = _baseline_bubble(filtered(text, selections))
+        _assert_bubble_equal(career_metrics(filtered(dataset, selections)), expected)
+        _assert_bubble_equal(cube.career_metrics(selections), expected)
+
+
+def test_cube_totals_match_groupby(dataset, cube):
+    text = decoded(dataset)
+    for selections in random_selections(text, cube.filter_columns):
+        rows = filtered(text, selections)
+        totals = cube.totals(selections)
+        assert totals["MATRICULADOS"] == int(rows["MATRICULADOS"].sum())
+        assert totals["INSTITUCIONES"] == rows["NOMBRE INSTITUCION"].nunique()
+        assert totals["CARRERAS"] == rows["NOMBRE CARRERA"].nunique()
+        assert totals["REGISTROS"] == len(rows)
+
+
+@pytest.mark.parametrize("column", ["NOMBRE CARRERA", "NOMBRE INSTITUCION"])
+def test_top_k_matches_sort(cube, column):
+    for selections in random_selections(cube.cells, cube.filter_columns, count=30):
+        summed = cube.sum_by(column, selections)
+        # Orden estable: a igual valor, la primera etiqueta
+        expected = (
+            summed.sort_values("MATRICULADOS", ascending=False, kind="stable")
+            .head(10)
+            .iloc[::-1]
+        )
+        result = top_k(summed, column, k=10, max_len=1_000)
+        assert result[column].tolist() == expected[column].astype(object).tolist()
+        assert result["MATRICULADOS"].tolist() == expected["MATRICULADOS"].tolist()
+
+
+# Nueva versión de la tabla: filas modificadas, eliminadas y agregadas (con
+# valores de filtro que no existían)
+def _modified(df, seed=0):
+    rng = np.random.default_rng(seed)
+    new = decoded(df).astype({"MATRICULADOS": "int64"})
+    changed = rng.choice(len(new), 40, replace=False)
+    new.loc[new.index[changed], "MATRICULADOS"] += rng.integers(1, 50, len(changed))
+    new = new.drop(new.index[rng.choice(len(new), 30, replace=False)])
+    added = new.sample(25, random_state=seed).assign(PAIS="ATLANTIDA")
+    new = pd.concat([new, added], ignore_index=True)
+    new, _ = optimize_dtypes(new)
+    new[PARTITION_COLUMN] = new[PARTITION_COLUMN].astype("category")
+    new.attrs["version"] = "nueva"
+    return freeze_frame(new)
+
+
+def test_apply_delta_matches_rebuild(dataset, cube):
+    new = _modified(dataset)
+    delta = diff_tables(dataset, new)
+    assert len(delta.added) and len(delta.removed) and len(delta.changed_new)
+    incremental = cube.apply_delta(delta, new)
+    rebuilt = Cube(new, cube.filter_columns, approximate=False)
+
+    for selections in random_selections(decoded(new), cube.filter_columns):
+        assert incremental.totals(selections) == rebuilt.totals(selections)
+        for col in cube.filter_columns:
+            assert incremental.options(col, selections) == rebuilt.options(
+                col, selections
+            )
+        for column in ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]:
+            pd.testing.assert_frame_equal(
+                incremental.sum_by(column, selections).reset_index(drop=True),
+                rebuilt.sum_by(column, selections).reset_index(drop=True),
+            )
+        _assert_bubble_equal(
+            incremental.career_metrics(selections), rebuilt.career_metrics(selections)
+        )
@@ -0,0 +1,70 @@
+import logging
+
+import pandas as pd
+import pytest
+
+import core.loader
+from core.loader import CATEGORY_COLUMNS, FILTER_COLUMNS, read_workbook, rss_bytes
+
+# La ingesta por bloques (read_workbook) frente a la lectura con
+# pd.read_excel que hacía el loader original.
+
+
+@pytest.fixture(scope="module")
+def workbook(workdir):
+    return str(workdir / "db" / "2022.xlsx")
+
+
+# Lectura original: pd.read_excel y limpieza de espacios
+def _read_excel(file_path):
+    df = pd.read_excel(file_path)
+    df.columns = df.columns.str.strip()
+    for col in FILTER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string").str.strip()
+    return df
+
+
+def _values(serie):
+    return [None if pd.isna(value) else value for value in serie.astype(object)]
+
+
+def test_read_workbook_matches_read_excel(workbook):
+    df = read_workbook(workbook, chunk_rows=500)
+    expected = _read_excel(workbook)
+
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected)
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype)
+            # Diccionario ordenado, como astype("category")
+            assert df[col].cat.categories.is_monotonic_increasing
+        assert _values(df[col]) == _values(expected[col]), col
+    assert pd.api.types.is_integer_dtype(df["MATRICULADOS"])
+
+
+def test_chunk_size_does_not_change_result(workbook):
+    pd.testing.assert_frame_equal(
+        read_workbook(workbook, chunk_rows=37), read_workbook(workbook)
+    )
+
+
+# El informe de memoria compara con lo que ocuparía la tabla de read_excel
+def test_memory_report(workbook, caplog):
+    with caplog.at_level(logging.INFO, logger="core.loader"):
+        df = read_workbook(workbook)
+    antes = pd.read_excel(workbook).memory_usage(index=False, deep=True).sum()
+    despues = df.memory_usage(index=False, deep=True).sum()
+    (record,) = [r for r in caplog.records if r.getMessage().startswith("Ingesta")]
+    assert record.args[2] == pytest.approx(antes / 1e6, rel=0.05)
+    assert record.args[3] == pytest.approx(despues / 1e6)
+    assert despues < antes
+
+
+def test_memory_cap_stops_ingest(workbook, monkeypatch):
+    if rss_bytes() is None:
+        pytest.skip("sin /proc/self/statm")
+    monkeypatch.setattr(core.loader, "INGEST_MAX_RSS_MB", 1)
+    with pytest.raises(MemoryError):
+        read_workbook(workbook, chunk_rows=500)
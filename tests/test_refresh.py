@@ -0,0 +1,107 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import core.refresh
+from core.refresh import Refresher
+
+# La fuente local con revalidación (core.refresh): una sola construcción a la
+# vez y la versión anterior servida mientras se construye la nueva.
+
+
+class FakeData:
+    def __init__(self):
+        self.signature = 1
+        self.loads = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.started = threading.Event()
+        self.fail = False
+
+    def load(self):
+        self.loads += 1
+        self.started.set()
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise OSError("libro a medio copiar")
+        return SimpleNamespace(version=f"v{self.signature}")
+
+
+@pytest.fixture
+def data(monkeypatch):
+    # Cada petición revisa la firma
+    monkeypatch.setattr(core.refresh, "CHECK_INTERVAL", 0)
+    return FakeData()
+
+
+def _refresher(data):
+    return Refresher(load=data.load, signature=lambda: data.signature, interval=0)
+
+
+def test_first_load_is_single_flight(data):
+    refresher = _refresher(data)
+    data.release.clear()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(refresher.current()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    data.started.wait(timeout=5)
+    data.release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert data.loads == 1
+    assert len(results) == 8
+    assert all(source is results[0] for source in results)
+
+
+def test_rebuild_in_background_serves_previous(data):
+    refresher = _refresher(data)
+    published = []
+    refresher.subscribe(published.append)
+    first = refresher.current()
+
+    data.signature = 2
+    data.started.clear()
+    data.release.clear()
+    # La primera petición dispara la construcción; las demás no esperan ni
+    # inician otra
+    assert refresher.current() is first
+    data.started.wait(timeout=5)
+    for _ in range(5):
+        assert refresher.current() is first
+        assert not refresher.revalidate(background=True)
+    assert data.loads == 2
+
+    data.release.set()
+    for _ in range(100):
+        if refresher.current() is not first:
+            break
+        time.sleep(0.01)
+    assert refresher.current().version == "v2"
+    assert [source.version for source in published] == ["v1", "v2"]
+    assert data.loads == 2
+
+
+def test_failed_rebuild_keeps_previous(data):
+    refresher = _refresher(data)
+    first = refresher.current()
+
+    data.signature = 2
+    data.fail = True
+    assert refresher.revalidate(background=False)
+    assert refresher.current() is first
+    assert isinstance(refresher.last_error, OSError)
+    # No se reintenta hasta que la firma vuelva a cambiar
+    assert not refresher.revalidate(background=False)
+
+    data.signature = 3
+    data.fail = False
+    assert refresher.revalidate(background=False)
+    assert refresher.current().version == "v3"
+    assert refresher.last_error is None
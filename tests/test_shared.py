@@ -0,0 +1,77 @@
+import mmap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.shared
+from core.cube import Cube
+from core.shared import TotalsTable, ensure_shared, map_cube, write_shared
+from tests.helpers import random_selections
+
+# Los arreglos compartidos (core.shared): el cubo mapeado desde disco responde
+# igual que el cubo en memoria, sin copiar las celdas.
+
+
+# ¿El arreglo es una vista de un archivo mapeado?
+def _is_mapped(array):
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def _assert_same_answers(mapped, cube):
+    for selections in random_selections(cube.cells, cube.filter_columns, count=40):
+        assert mapped.totals(selections) == cube.totals(selections)
+        assert mapped.options("PAIS", selections) == cube.options("PAIS", selections)
+        pd.testing.assert_frame_equal(
+            mapped.sum_by("NOMBRE CARRERA", selections),
+            cube.sum_by("NOMBRE CARRERA", selections),
+        )
+        pd.testing.assert_frame_equal(
+            mapped.career_metrics(selections), cube.career_metrics(selections)
+        )
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_mapped_cube_matches(dataset, cube, tmp_path, approximate):
+    if approximate:
+        cube = Cube(dataset, cube.filter_columns, approximate=True)
+    path = str(tmp_path / "compartido")
+    write_shared(cube, path)
+    mapped = map_cube(path)
+
+    assert mapped.version == cube.version
+    assert mapped.approximate == approximate
+    # Las columnas numéricas son vistas de solo lectura del archivo mapeado
+    matriculados = mapped.cells["MATRICULADOS"].to_numpy()
+    assert _is_mapped(matriculados)
+    assert not matriculados.flags.writeable
+    _assert_same_answers(mapped, cube)
+
+
+def test_totals_table_round_trip(cube):
+    categories = [cube.cells[col].cat.categories for col in cube.filter_columns]
+    totals = dict(cube.totals_items())
+    totals[next(iter(totals))] = dict(
+        next(iter(totals.values())), INSTITUCIONES=None, CARRERAS=None
+    )
+    table = TotalsTable.from_totals(categories, totals.items(), np.dtype("int64"))
+    for key, value in totals.items():
+        assert table.get(key) == value
+    missing = tuple("NO EXISTE" if col == "PAIS" else None for col in cube.filter_columns)
+    assert table.get(missing, "vacío") == "vacío"
+
+
+def test_ensure_shared_builds_once(workdir, cube, tmp_path, monkeypatch):
+    monkeypatch.chdir(workdir)
+    monkeypatch.setattr(core.shared, "SHARED_DIR", str(tmp_path / "compartido"))
+    monkeypatch.setattr(core.shared, "APPROXIMATE_DISTINCT", False)
+    path = ensure_shared("db")
+
+    # Con el directorio ya escrito no se vuelven a leer los libros
+    monkeypatch.setattr(core.shared, "load_dataset", None)
+    assert ensure_shared("db") == path
+    _assert_same_answers(map_cube(path), cube)
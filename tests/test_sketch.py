@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from core.cards import distinct_value
+from core.cube import Cube
+from core.sketch import DistinctSketches
+from tests.helpers import random_selections
+
+# Los conteos de HyperLogLog (core.sketch) dentro del error que anuncian y el
+# cubo aproximado frente al exacto.
+
+# Margen sobre el error típico (1.04/√2^p es una desviación estándar)
+TOLERANCE = 4
+
+
+@pytest.mark.parametrize("precision", [10, 14])
+@pytest.mark.parametrize("cardinality", [50, 2_000, 100_000])
+def test_sketch_error_bound(precision, cardinality):
+    rng = np.random.default_rng(cardinality + precision)
+    # Hashes de 64 bits completos, como los de hash_values
+    hashes = rng.integers(0, 2**64, size=cardinality, dtype=np.uint64)
+    # Cada valor repetido varias veces y repartido en 8 grupos
+    values = np.repeat(hashes, 3)
+    groups = rng.integers(0, 8, size=len(values))
+    valid = np.ones(len(values), dtype=bool)
+    sketches = DistinctSketches(groups, valid, values, 8, precision=precision)
+
+    assert sketches.error == pytest.approx(1.04 / np.sqrt(2**precision))
+    bound = TOLERANCE * sketches.error * cardinality
+    assert abs(sketches.count() - cardinality) <= bound
+
+    # La unión de un subconjunto de grupos frente a su conteo exacto
+    subset = [1, 4, 6]
+    exact = len(np.unique(values[np.isin(groups, subset)]))
+    assert abs(sketches.count(subset) - exact) <= TOLERANCE * sketches.error * exact
+
+
+def test_sketch_ignores_invalid_and_empty_groups():
+    hashes = np.arange(1, 101, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    groups = np.zeros(100, dtype=np.int64)
+    valid = np.arange(100) < 10
+    sketches = DistinctSketches(groups, valid, hashes, 2)
+    assert sketches.count([0]) == 10
+    assert sketches.count([1]) == 0
+
+
+def test_approximate_cube_within_error(dataset, cube):
+    approximate = Cube(dataset, cube.filter_columns, approximate=True)
+    for selections in random_selections(cube.cells, cube.filter_columns):
+        exact = cube.totals(selections)
+        totals = approximate.totals(selections)
+        assert totals["MATRICULADOS"] == exact["MATRICULADOS"]
+        assert totals["REGISTROS"] == exact["REGISTROS"]
+        for name in ["INSTITUCIONES", "CARRERAS"]:
+            bound = TOLERANCE * totals["ERROR_DISTINTOS"] * exact[name]
+            assert abs(totals[name] - exact[name]) <= max(bound, 1)
+
+
+# Los totales guardados de un cubo aproximado no tienen conteos distintos:
+# leerlos como exactos falla en lugar de mostrar 0
+def test_approximate_rollups_are_unresolved(dataset, cube):
+    approximate = Cube(dataset, cube.filter_columns, approximate=True)
+    approximate.approximate = False
+    totals = approximate.totals({})
+    assert totals["INSTITUCIONES"] is None
+    assert totals["CARRERAS"] is None
+    with pytest.raises(ValueError):
+        distinct_value(totals, "INSTITUCIONES")
@@ -0,0 +1,93 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from core.aggregations import top_k
+from core.queries import RANKING_SIZE
+from core.sources import SqlSource
+from tests.helpers import decoded, random_selections
+
+# La fuente SQL (core.sources) sobre una tabla SQLite con los mismos datos
+# que el cubo: mismas respuestas para selecciones al azar.
+
+COLUMNS = [
+    "PAIS",
+    "FINANCIAMIENTO",
+    "TIPO",
+    "NIVEL",
+    "FACULTAD ASOCIADA",
+    "NOMBRE CARRERA",
+    "NOMBRE INSTITUCION",
+    "MATRICULADOS",
+]
+
+
+def _write_table(df, path):
+    conn = sqlite3.connect(path)
+    try:
+        decoded(df[COLUMNS]).to_sql("oferta", conn, index=False)
+    finally:
+        conn.close()
+
+
+def _connect(path):
+    return lambda: sqlite3.connect(path, check_same_thread=False)
+
+
+@pytest.fixture(scope="module")
+def database(dataset, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sql") / "oferta.db")
+    _write_table(dataset, path)
+    return path
+
+
+def _plain(df):
+    return decoded(df).reset_index(drop=True)
+
+
+def test_sql_source_matches_cube(database, cube):
+    source = SqlSource(_connect(database))
+    # La tabla SQL no tiene la columna de partición del cubo
+    for selections in random_selections(cube.cells, source.filter_columns):
+        assert source.totals(selections) == cube.totals(selections)
+        for column in ["PAIS", "NIVEL", "FACULTAD ASOCIADA"]:
+            assert source.options(column, selections) == cube.options(
+                column, selections
+            )
+        for column in ["NOMBRE CARRERA", "NOMBRE INSTITUCION"]:
+            pd.testing.assert_frame_equal(
+                source.sum_by(column, selections),
+                _plain(cube.sum_by(column, selections)),
+            )
+            pd.testing.assert_frame_equal(
+                top_k(source.top_candidates(column, selections, RANKING_SIZE), column),
+                top_k(cube.top_candidates(column, selections, RANKING_SIZE), column),
+                check_index_type=False,
+            )
+        pd.testing.assert_frame_equal(
+            source.career_metrics(selections),
+            _plain(cube.career_metrics(selections)),
+        )
+
+
+# Pasar matriculados de una fila a otra mantiene filas y total, pero no la
+# versión
+def test_sql_version_tracks_changes(dataset, database, tmp_path):
+    version = SqlSource(_connect(database)).version
+    assert SqlSource(_connect(database)).version == version
+
+    changed = dataset[COLUMNS].copy()
+    changed["MATRICULADOS"] = changed["MATRICULADOS"].astype("int64")
+    changed.loc[changed.index[0], "MATRICULADOS"] += 5
+    changed.loc[changed.index[-1], "MATRICULADOS"] -= 5
+    path = str(tmp_path / "oferta.db")
+    _write_table(changed, path)
+    assert SqlSource(_connect(path)).version != version
+
+
+def test_sql_version_query(database):
+    query = 'SELECT COUNT(*), SUM("MATRICULADOS") FROM oferta'
+    source = SqlSource(_connect(database), version_query=query)
+    assert source.version != SqlSource(_connect(database)).version
+    assert source.version == SqlSource(_connect(database), version_query=query).version
@@ -0,0 +1,123 @@
+import itertools
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+import core.accesslog
+import core.warmup
+from core.accesslog import AccessLog
+from core.warmup import hot_entries, warm
+
+# El registro de accesos (core.accesslog) y el precalentamiento con sus topes
+# de tiempo y memoria (core.warmup).
+
+
+@pytest.fixture
+def access_log(tmp_path, monkeypatch):
+    # Sin escrituras automáticas: solo al llamar flush() o top()
+    monkeypatch.setattr(core.accesslog, "FLUSH_INTERVAL", 3600)
+    return AccessLog(str(tmp_path / "accesos.sqlite"))
+
+
+def test_access_log_top(access_log):
+    for _ in range(3):
+        access_log.record("Ranking", {"PAIS": "CHILE"}, 0.2)
+    access_log.record("Dashboard", {"PAIS": "CHILE", "NIVEL": np.str_("PREGRADO")}, 1.0)
+    access_log.record("Dashboard", {"NIVEL": "PREGRADO", "PAIS": "CHILE"}, 0.5)
+    access_log.record("Dashboard", {}, 2.0)
+    access_log.record("Otra", {}, 9.0)
+
+    top = access_log.top(10, pages=["Dashboard", "Ranking"])
+    assert top == [
+        ("Ranking", {"PAIS": "CHILE"}, 3, pytest.approx(0.2)),
+        # Misma selección en otro orden: una sola combinación
+        ("Dashboard", {"NIVEL": "PREGRADO", "PAIS": "CHILE"}, 2, pytest.approx(0.75)),
+        ("Dashboard", {}, 1, pytest.approx(2.0)),
+    ]
+    assert access_log.top(1)[0][0] == "Ranking"
+
+
+def test_access_log_batches_and_accumulates(access_log):
+    access_log.record("Ranking", {}, 1.0)
+    assert not os.path.exists(access_log.path)
+    access_log.flush()
+    access_log.record("Ranking", {}, 3.0)
+    # Lo pendiente se suma a lo ya escrito
+    assert access_log.top(5) == [("Ranking", {}, 2, pytest.approx(2.0))]
+
+
+def test_access_log_forgets_old_entries(access_log):
+    access_log.record("Ranking", {"PAIS": "PERU"}, 1.0)
+    access_log.flush()
+    conn = sqlite3.connect(access_log.path)
+    with conn:
+        conn.execute("UPDATE accesos SET ultima = 0")
+    conn.close()
+    access_log.record("Ranking", {}, 1.0)
+    assert [entry[1] for entry in access_log.top(5)] == [{}]
+
+
+def test_hot_entries_capped_by_cache(access_log, monkeypatch):
+    for i in range(10):
+        access_log.record("Ranking", {"PAIS": f"P{i}"}, 0.1)
+    access_log.record("Otra", {}, 0.1)
+    monkeypatch.setattr(core.warmup.RESULTS, "max_entries", 4)
+    entries = hot_entries(50, access_log=access_log)
+    assert len(entries) == 4
+    assert {entry[0] for entry in entries} == {"Ranking"}
+    assert hot_entries(0, access_log=access_log) == []
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def query(source, selections):
+        if selections.get("falla"):
+            raise ValueError("consulta inválida")
+        calls.append(selections["i"])
+        time.sleep(0.01)
+
+    monkeypatch.setattr(core.warmup, "PAGE_QUERIES", {"Dashboard": query})
+    return calls
+
+
+def _entries(n):
+    return [("Dashboard", {"i": i}, n - i, 0.1) for i in range(n)]
+
+
+def test_warm_computes_all_within_budget(calls):
+    entries = _entries(10) + [("Dashboard", {"falla": True}, 1, 0.1)]
+    assert warm(None, entries, seconds=10, max_mb=0, workers=2) == 10
+    assert sorted(calls) == list(range(10))
+
+
+def test_warm_stops_at_time_budget(calls):
+    done = warm(None, _entries(50), seconds=0.05, max_mb=0, workers=1)
+    assert 1 <= done < 50
+    # Se calculan en orden: primero las más visitadas
+    assert calls == list(range(done))
+
+
+def test_warm_stops_at_memory_budget(calls, monkeypatch):
+    # Cada medición suma 1 MB
+    rss = itertools.count(100_000_000, 1_000_000)
+    monkeypatch.setattr(core.warmup, "rss_bytes", lambda: next(rss))
+    done = warm(None, _entries(20), seconds=10, max_mb=3, workers=1)
+    assert done == 3
+
+
+def test_warm_stops_when_source_is_replaced(calls):
+    current = iter([True, True, False])
+    done = warm(
+        None,
+        _entries(10),
+        seconds=10,
+        max_mb=0,
+        workers=1,
+        is_current=lambda: next(current, False),
+    )
+    assert done == 2